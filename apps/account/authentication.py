@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TOKEN_VERSION_CACHE_KEY, ClaimsUser, User, cache_token_versions
+
+
+def current_token_version(user_id):
+    """Foydalanuvchining amaldagi token versiyasi (-1 — faol emas yoki o‘chirilgan)"""
+    version = None
+    if settings.TOKEN_VERSION_CACHE_TIMEOUT:
+        version = cache.get(TOKEN_VERSION_CACHE_KEY.format(user_id))
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list('is_active', 'token_version').first()
+        version = row[1] if row and row[0] else -1
+        cache_token_versions({user_id: version})
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    User qatorini har so‘rovda bazadan o‘qimaydigan JWT autentifikatsiyasi.
+
+    Foydalanuvchi token claimlaridan (ClaimsUser) tuziladi; token versiyasi umumiy keshdagi
+    (u bo‘lmasa bazadagi) qiymat bilan solishtiriladi, shuning uchun rol o‘zgarganda yoki
+    foydalanuvchi faolsizlantirilganda eski tokenlar darhol rad etiladi. 'ver' claimi bo‘lmagan eski
+    tokenlar odatdagidek bazadan tekshiriladi.
+    """
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token or 'role' not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token tarkibida foydalanuvchi identifikatori yo‘q.")
+
+        if current_token_version(user_id) != validated_token['ver']:
+            raise AuthenticationFailed("Token eskirgan, qaytadan tizimga kiring.", code='token_version_mismatch')
+        return ClaimsUser.from_claims(user_id, validated_token)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    # OpenAPI sxemasida odatdagi JWT (Bearer) bilan bir xil
+    target_class = ClaimsJWTAuthentication
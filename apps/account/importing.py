@@ -0,0 +1,194 @@
+"""
+Owner/manager larni fayldan ommaviy qo‘shish (`import_users` buyrug‘i va admin API).
+
+Fayl (CSV yoki NDJSON) qatorma-qator o‘qiladi va `batch_size` lik guruhlarda ishlanadi:
+- qatorlar tekshiriladi, fayl ichidagi va bazadagi takroriy telefonlar xato sifatida qaytadi;
+- parollar ProcessPoolExecutor da parallel hashlanadi (PBKDF2 bitta yadroda sekin), API da jarayonlar
+  soni USER_IMPORT_API_WORKERS bilan cheklanadi;
+- `max_rows` berilsa, undan katta fayl hech kim qo‘shilmasdan rad etiladi;
+- foydalanuvchilar bulk_create bilan qo‘shiladi, bitta qatordagi xato butun guruhni to‘xtatmaydi.
+
+bulk_create signallarni chaqirmaydi, shuning uchun ro‘yxatdan o‘tishlar yig‘indisi, statistika
+keshi va token versiyalari keshi shu yerda yangilanadi.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import USER_STATS_CACHE_KEY, User, adjust_signups, cache_token_versions
+from .serializers import UserImportRowSerializer
+
+# Bundan kam parol bo‘lsa, jarayonlar ishga tushirilmaydi
+MIN_POOL_ROWS = 16
+
+
+def guess_format(filename):
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """(qator raqami, dict yoki xato matni) juftliklarini yield qiladi; fayl xotiraga to‘liq o‘qilmaydi"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, "JSON noto‘g‘ri."
+            continue
+        yield line_no, row if isinstance(row, dict) else "Qator JSON obyekt bo‘lishi kerak."
+
+
+def text_stream(file):
+    # Yuklangan (binary) faylni matn sifatida o‘qish, Excel BOM i bilan ham
+    return io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+
+def setup_worker(settings_module):
+    # spawn bilan ishga tushgan jarayonlarda Django sozlanmagan bo‘ladi (fork da shart emas)
+    if not django_apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+
+
+class UserImporter:
+    """
+    Foydalanuvchilarni guruhlab qo‘shadi va natija hisobotini yig‘adi:
+    `created`, `failed` va `errors` ([{line, phone, errors}]).
+    """
+
+    def __init__(self, created_by=None, default_role=None, batch_size=None, workers=None):
+        self.created_by = created_by
+        self.default_role = default_role
+        self.batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+        self.workers = workers or settings.USER_IMPORT_WORKERS or os.cpu_count()
+        self.created = 0
+        self.errors = []
+        self.pool = None
+
+    @property
+    def report(self):
+        errors = sorted(self.errors, key=lambda error: error['line'])
+        return {'created': self.created, 'failed': len(errors), 'errors': errors}
+
+    def run(self, rows, max_rows=None):
+        if max_rows:
+            # Oldingi guruhlar bazaga yozilib qolmasligi uchun qatorlar soni avval tekshiriladi
+            rows = list(islice(rows, max_rows + 1))
+            if len(rows) > max_rows:
+                self.add_error(rows[-1][0], None, {'non_field_errors': [f"Fayl {max_rows} qatordan oshmasligi kerak."]})
+                return self.report
+        seen = set()
+        batch = []
+        try:
+            for line_no, row in rows:
+                item = self.validate(line_no, row, seen)
+                if item is not None:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.insert(batch)
+                    batch = []
+            if batch:
+                self.insert(batch)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        return self.report
+
+    def add_error(self, line_no, phone, errors):
+        self.errors.append({'line': line_no, 'phone': phone, 'errors': errors})
+
+    def validate(self, line_no, row, seen):
+        if isinstance(row, str):
+            self.add_error(line_no, None, {'non_field_errors': [row]})
+            return None
+        data = {key: value for key, value in row.items() if key and value not in (None, '')}
+        if self.default_role:
+            data.setdefault('role', self.default_role)
+        serializer = UserImportRowSerializer(data=data)
+        if not serializer.is_valid():
+            self.add_error(line_no, data.get('phone'), serializer.errors)
+            return None
+        item = serializer.validated_data
+        if item['phone'] in seen:
+            self.add_error(line_no, item['phone'], {'phone': ["Telefon raqami faylda takrorlangan."]})
+            return None
+        seen.add(item['phone'])
+        return line_no, item
+
+    def hash_passwords(self, passwords):
+        if len(passwords) < MIN_POOL_ROWS or self.workers < 2:
+            return [make_password(password) for password in passwords]
+        if self.pool is None:
+            settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=setup_worker, initargs=(settings_module,),
+            )
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.pool.map(make_password, passwords, chunksize=chunksize))
+
+    def insert(self, batch):
+        # Bazada bor telefonlar hashlashdan oldin chiqarib tashlanadi (bitta so‘rov)
+        existing = set(User.objects.filter(phone__in=[item['phone'] for _, item in batch]).values_list('phone', flat=True))
+        pending = []
+        for line_no, item in batch:
+            if item['phone'] in existing:
+                self.add_error(line_no, item['phone'], {'phone': ["Telefon raqami allaqachon ro‘yxatdan o‘tgan."]})
+            else:
+                pending.append((line_no, item))
+        if not pending:
+            return
+
+        hashes = self.hash_passwords([item['password'] for _, item in pending])
+        users = [
+            (line_no, User(
+                name=item['name'], phone=item['phone'], password=password, role=item['role'],
+                is_active=True, created_by=self.created_by,
+            ))
+            for (line_no, item), password in zip(pending, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                created = User.objects.bulk_create([user for _, user in users])
+                self.after_create(created)
+        except IntegrityError:
+            # Telefon parallel so‘rovda band qilingan: qatorlar alohida savepoint bilan qo‘shiladi
+            created = []
+            for line_no, user in users:
+                try:
+                    with transaction.atomic():
+                        User.objects.bulk_create([user])
+                        self.after_create([user])
+                except IntegrityError:
+                    user.pk = None
+                    self.add_error(line_no, user.phone, {'phone': ["Telefon raqami allaqachon ro‘yxatdan o‘tgan."]})
+                else:
+                    created.append(user)
+        self.created += len(created)
+
+    @staticmethod
+    def after_create(users):
+        # post_save signallari o‘rniga (bulk_create ularni chaqirmaydi)
+        deltas = {}
+        for user in users:
+            key = (timezone.localdate(user.created_date), user.role)
+            deltas[key] = deltas.get(key, 0) + 1
+        adjust_signups(deltas)
+        transaction.on_commit(lambda: cache_token_versions({user.pk: user.token_version for user in users}))
+        transaction.on_commit(lambda: cache.delete(USER_STATS_CACHE_KEY))
@@ -0,0 +1,18 @@
+from django.contrib.postgres.indexes import GinIndex
+
+
+class PostgresGinIndex(GinIndex):
+    """
+    Faqat PostgreSQL da yaratiladigan GIN indeks (masalan, pg_trgm `gin_trgm_ops`). Boshqa bazalarda
+    (SQLite) bo‘sh SQL qaytaradi, shuning uchun migratsiyalar va jadvalni qayta qurish ishlayveradi.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, **kwargs)
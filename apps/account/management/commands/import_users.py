@@ -0,0 +1,47 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.account.importing import UserImporter, guess_format, read_rows
+from apps.account.models import User
+
+
+class Command(BaseCommand):
+    help = "Owner/manager larni CSV (name,phone,password,role) yoki NDJSON fayldan ommaviy qo‘shadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fayl yo‘li, '-' — stdin")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Standart: fayl kengaytmasidan")
+        parser.add_argument('--role', choices=['owner', 'manager'], help="Qatorda `role` bo‘lmasa ishlatiladi")
+        parser.add_argument('--created-by', help="created_by ga yoziladigan foydalanuvchi telefoni")
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--workers', type=int, help="Parol hashlash jarayonlari soni")
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['created_by']:
+            created_by = User.objects.filter(phone=options['created_by']).first()
+            if created_by is None:
+                raise CommandError(f"{options['created_by']} telefonli foydalanuvchi topilmadi.")
+
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = UserImporter(
+            created_by=created_by, default_role=options['role'],
+            batch_size=options['batch_size'], workers=options['workers'],
+        )
+        if path == '-':
+            report = importer.run(read_rows(sys.stdin, fmt))
+        else:
+            try:
+                with open(path, encoding='utf-8-sig', newline='') as stream:
+                    report = importer.run(read_rows(stream, fmt))
+            except OSError as error:
+                raise CommandError(str(error))
+
+        for error in report['errors']:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} ta foydalanuvchi qo‘shildi, {report['failed']} ta qatorda xato."
+        ))
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.account.models import USER_STATS_CACHE_KEY, User, UserSignupDay, signup_counts
+
+
+class Command(BaseCommand):
+    help = "UserSignupDay yig‘indilarini foydalanuvchilardan qaytadan hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = signup_counts(User.objects.all())
+        with transaction.atomic():
+            UserSignupDay.objects.all().delete()
+            UserSignupDay.objects.bulk_create(
+                (UserSignupDay(day=day, role=role, count=total) for (day, role), total in counts.items()),
+                batch_size=options['batch_size'],
+            )
+        cache.delete(USER_STATS_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS(f"{len(counts)} ta kun-rol yig‘indisi qayta hisoblandi."))
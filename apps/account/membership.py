@@ -0,0 +1,61 @@
+"""
+Foydalanuvchi roli va guruhlarini aniqlash (permission klasslari uchun umumiy).
+
+Guruh nomlari so‘rov davomida foydalanuvchi obyektida, so‘rovlar orasida esa Django keshida
+saqlanadi; `groups` m2m o‘zgarganda, guruh nomi o‘zgarganda yoki o‘chirilganda kesh tozalanadi.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+GROUPS_CACHE_KEY = 'account:groups:{}'
+MANAGER_GROUP = 'Manager'
+
+
+def user_group_names(user):
+    if not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, '_group_names', None)
+    if names is None:
+        key = GROUPS_CACHE_KEY.format(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, names, settings.USER_GROUPS_CACHE_TIMEOUT)
+        user._group_names = names  # Shu so‘rov davomida
+    return names
+
+
+def in_group(user, name):
+    return name in user_group_names(user)
+
+
+def has_role(user, *roles):
+    return user.is_authenticated and user.role in roles
+
+
+def is_owned_by(obj, user, field):
+    # FK obyektini yuklamasdan, faqat id bo‘yicha solishtirish
+    return user.pk is not None and getattr(obj, f'{field}_id') == user.pk
+
+
+def invalidate_user_groups(user_ids):
+    cache.delete_many([GROUPS_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_user_groups([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # group.user_set.add/remove
+        invalidate_user_groups(pk_set)
+    elif action == 'pre_clear':
+        # group.user_set.clear(): a‘zolar tozalanishidan oldin olinadi
+        invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
+
+
+def group_changed(sender, instance, **kwargs):
+    # Guruh nomi o‘zgargan yoki guruh o‘chirilayotgan bo‘lsa
+    if not kwargs.get('created'):
+        invalidate_user_groups(instance.user_set.values_list('pk', flat=True))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def fill_signups(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    UserSignupDay = apps.get_model('account', 'UserSignupDay')
+    rows = User.objects.annotate(day=TruncDate('created_date')).values('day', 'role').annotate(total=Count('id')).order_by()
+    UserSignupDay.objects.bulk_create(
+        (UserSignupDay(day=row['day'], role=row['role'], count=row['total']) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_claims_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSignupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('owner', 'Owner'), ('manager', 'Manager'), ('user', 'User')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Kunlik ro‘yxatdan o‘tishlar',
+                'verbose_name_plural': 'Kunlik ro‘yxatdan o‘tishlar',
+                'constraints': [models.UniqueConstraint(fields=('day', 'role'), name='signup_day_role_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_signups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 07:00
+
+import apps.account.indexes
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_user_signup_day'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'created_date', 'id'], name='user_role_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', 'created_date', 'id'], name='user_active_created_idx'),
+        ),
+        # pg_trgm GIN indekslari (?q= qidiruvi) faqat PostgreSQL da yaratiladi
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=apps.account.indexes.PostgresGinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'), name='gin_trgm_ops',
+                ),
+                name='user_name_trgm_gin',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=apps.account.indexes.PostgresGinIndex(
+                django.contrib.postgres.indexes.OpClass('phone', name='gin_trgm_ops'), name='user_phone_trgm_gin',
+            ),
+        ),
+    ]
@@ -1,11 +1,57 @@
-from django.db import models
-from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import IntegrityError, connections, models, router, transaction
+from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Group, PermissionsMixin
 from django.core.exceptions import ValidationError
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import TruncDate, TruncWeek, Upper
+from django.utils import timezone
+from datetime import timedelta
 from random import randint
-from django.db.models.signals import pre_save
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete
+from .cache import TTLCache
+from .indexes import PostgresGinIndex
+from .membership import group_changed, user_groups_changed
 
+TOKEN_VERSION_CACHE_KEY = 'account:token_version:{}'
+USER_STATS_CACHE_KEY = 'account:user_stats'
+MAX_SIGNUP_SERIES_DAYS = 366
+# JWT claimlariga yoziladigan maydonlar: birortasi o‘zgarsa token_version oshiriladi
+CLAIM_FIELDS = ('name', 'phone', 'role', 'is_staff', 'is_superuser', 'is_active')
+# Rol -> statistikadagi kalit
+ROLE_STATS_KEYS = {'admin': 'admins', 'owner': 'owners', 'manager': 'managers', 'user': 'users'}
+# ClaimsUser ning to‘liq qatorlari: (user_id, token_version) -> {attname: qiymat}
+claims_user_rows = TTLCache(settings.CLAIMS_USER_CACHE_SIZE, settings.CLAIMS_USER_CACHE_TTL)
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(models.QuerySet):
+    def search(self, query):
+        """
+        Ism va telefon bo‘yicha qidiruv, `search_rank` bo‘yicha saralangan (ism boshlanishi birinchi).
+        PostgreSQL da pg_trgm GIN indekslari ishlatiladi: icontains `UPPER(name) LIKE UPPER(...)` ga
+        kompilyatsiya qilinadi, shuning uchun ism indeksi UPPER(name) ustida va trigram o‘xshashligi ham
+        shu ifoda bo‘yicha (pg_trgm registrni farqlamaydi); boshqa bazalarda (SQLite) icontains.
+        """
+        digits = ''.join(char for char in query if char.isdigit())
+        condition = Q(name__icontains=query)
+        if digits:
+            condition |= Q(phone__contains=digits)
+        rank = Case(
+            When(name__istartswith=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        qs = self
+        if connections[self.db].vendor == 'postgresql':
+            qs = qs.alias(upper_name=Upper('name'))
+            condition |= Q(upper_name__trigram_similar=query)
+            rank = rank + TrigramSimilarity('name', query)
+        return qs.filter(condition).annotate(search_rank=rank).order_by('-search_rank', '-created_date')
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, phone, name, password=None, role='user', **extra_fields):
         if not phone:
             raise ValueError('The Phone field must be set')
@@ -51,6 +97,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         related_name='created_users',
         help_text="Bu foydalanuvchini kim qo‘shganini ko‘rsatadi"
     )
+    # CLAIM_FIELDS dan biri o‘zgarganda oshiriladi: eski JWT lar ('ver' claimi) bekor bo‘ladi
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     modified_date = models.DateTimeField(auto_now=True)
     created_date = models.DateTimeField(auto_now_add=True)
 
@@ -58,15 +106,147 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'phone'
     REQUIRED_FIELDS = ['name']
 
+    class Meta:
+        indexes = [
+            # Keyset sahifalash tartibi: (created_date, id)
+            models.Index(fields=['created_date', 'id'], name='user_created_id_idx'),
+            # Ro‘yxatdagi role / is_active filtrlari shu tartib bilan
+            models.Index(fields=['role', 'created_date', 'id'], name='user_role_created_idx'),
+            models.Index(fields=['is_active', 'created_date', 'id'], name='user_active_created_idx'),
+            # ?q= qidiruvi (pg_trgm, faqat PostgreSQL): ism icontains/o‘xshashlik, telefon contains
+            PostgresGinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='user_name_trgm_gin'),
+            PostgresGinIndex(OpClass('phone', name='gin_trgm_ops'), name='user_phone_trgm_gin'),
+        ]
+
     def clean(self):
         super().clean()
         if User.objects.filter(phone=self.phone).exists():
             raise ValidationError({'phone': "Ushbu telefon raqami allaqachon ro‘yxatdan o‘tgan."})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Claim maydonlari (va rol — ro‘yxatdan o‘tishlar yig‘indisi uchun) o‘zgarganini aniqlash
+        instance._loaded_claims = {}
+        instance.remember_claims(CLAIM_FIELDS)
+        return instance
+
+    def remember_claims(self, fields):
+        # Deferred (yuklanmagan) maydonlar o‘tkazib yuboriladi
+        loaded = self.__dict__.setdefault('_loaded_claims', {})
+        loaded.update({name: self.__dict__[name] for name in CLAIM_FIELDS if name in fields and name in self.__dict__})
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.remember_claims(CLAIM_FIELDS if fields is None else fields)
+
+    def save(self, *args, **kwargs):
+        # Admin panel yoki istalgan save() orqali ism/telefon/rol/huquq/faollik o‘zgarsa, eski JWT lar bekor bo‘ladi.
+        # pre_save signalida update_fields ni kengaytirib bo‘lmagani uchun shu yerda
+        loaded = getattr(self, '_loaded_claims', None)
+        if loaded and any(self.__dict__.get(name, value) != value for name, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = {}
+        self.remember_claims(CLAIM_FIELDS)
+
     def __str__(self):
         return f"{self.name}--> ({self.role})"
 
 
+class ClaimsUser(User):
+    """
+    JWT claimlaridan bazaga murojaat qilmasdan tuzilgan foydalanuvchi (ClaimsJWTAuthentication).
+    id, phone, name, role, is_staff, is_superuser va token_version yuklangan, qolganlari deferred:
+    birinchi murojaatda to‘liq qator qisqa muddatli LRU keshdan yoki bitta so‘rov bilan olinadi.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        values = {
+            'id': user_id,
+            'phone': claims['phone'],
+            'name': claims.get('name', ''),
+            'role': claims['role'],
+            # is_active claimda yo‘q: deferred qoladi va kerak bo‘lsa bazadan o‘qiladi
+            'is_staff': claims.get('is_staff', False),
+            'is_superuser': claims.get('is_superuser', False),
+            'token_version': claims['ver'],
+        }
+        field_names = [field.attname for field in cls._meta.concrete_fields if field.attname in values]
+        user = cls.from_db(router.db_for_read(cls), field_names, [values[name] for name in field_names])
+        user.remember_values(field_names)
+        return user
+
+    def remember_values(self, attnames):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        loaded.update({name: self.__dict__[name] for name in attnames if name in self.__dict__})
+
+    def changed_fields(self):
+        """Yuklangandan keyin o‘zgartirilgan (yoki yangi berilgan) maydonlar"""
+        loaded = self.__dict__.get('_loaded_values', {})
+        return {
+            field.attname for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+            and (field.attname not in loaded or self.__dict__[field.attname] != loaded[field.attname])
+        }
+
+    def save(self, *args, **kwargs):
+        # Claimlardan olingan qiymatlar eskirgan bo‘lishi mumkin: to‘liq qator yozilmaydi, faqat shu so‘rovda
+        # o‘zgartirilgan maydonlar (aks holda boshqa joyda o‘zgargan ism/telefon eski qiymatiga qaytardi)
+        if self.pk is not None and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            changed = self.changed_fields()
+            kwargs['update_fields'] = changed | {'modified_date'} if changed else ()
+        super().save(*args, **kwargs)
+        self._loaded_values = {}
+        self.remember_values([field.attname for field in self._meta.concrete_fields])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if from_queryset is not None or not deferred or (fields is not None and not set(fields) <= deferred):
+            super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+            self.remember_values([field.attname for field in self._meta.concrete_fields] if fields is None else fields)
+            return
+
+        key = (self.pk, self.token_version)
+        row = claims_user_rows.get(key)
+        if row is None:
+            attnames = [field.attname for field in self._meta.concrete_fields]
+            row = User.objects.using(using or self._state.db).filter(pk=self.pk).values(*attnames).first()
+            if row is None:
+                raise User.DoesNotExist("Foydalanuvchi topilmadi.")
+            claims_user_rows.set(key, row)
+        for attname in deferred:
+            setattr(self, attname, row[attname])
+        self.remember_claims(deferred)
+        self.remember_values(deferred)
+
+
+class UserSignupDay(models.Model):
+    """
+    Kunlik ro‘yxatdan o‘tishlar yig‘indisi (rol bo‘yicha). User signallari orqali oshib/kamayib
+    boradi, `rebuild_signup_rollup` buyrug‘i bilan qaytadan hisoblanadi.
+    """
+    day = models.DateField()
+    role = models.CharField(max_length=10, choices=User.ROLE_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'role'], name='signup_day_role_uniq'),
+        ]
+        verbose_name = "Kunlik ro‘yxatdan o‘tishlar"
+        verbose_name_plural = "Kunlik ro‘yxatdan o‘tishlar"
+
+    def __str__(self):
+        return f"{self.day} - {self.role}: {self.count}"
+
+
 class UserToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     token = models.PositiveIntegerField()
@@ -80,3 +260,104 @@ def user_token_pre_save(sender, instance, *args, **kwargs):
 
 
 pre_save.connect(user_token_pre_save, sender=UserToken)
+
+
+def get_user_stats():
+    """Rollar bo‘yicha sonlar bitta shartli agregat so‘rovda (adminlar ham total_users ga kiradi)"""
+    stats = cache.get(USER_STATS_CACHE_KEY)
+    if stats is None:
+        stats = User.objects.aggregate(
+            total_users=Count('id'),
+            **{key: Count('id', filter=Q(role=role)) for role, key in ROLE_STATS_KEYS.items()},
+        )
+        cache.set(USER_STATS_CACHE_KEY, stats, settings.USER_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def signup_counts(users):
+    """{(kun, rol): soni} — foydalanuvchilardan hisoblangan (qayta qurish uchun)"""
+    rows = users.annotate(day=TruncDate('created_date')).values('day', 'role').annotate(total=Count('id')).order_by()
+    return {(row['day'], row['role']): row['total'] for row in rows}
+
+
+def adjust_signups(deltas):
+    """Yig‘indini {(kun, rol): o‘zgarish} bo‘yicha yangilaydi (F() bilan, parallel yozuvlarda ham to‘g‘ri)"""
+    for (day, role), delta in deltas.items():
+        if not delta:
+            continue
+        rows = UserSignupDay.objects.filter(day=day, role=role)
+        if rows.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                UserSignupDay.objects.create(day=day, role=role, count=delta)
+        except IntegrityError:
+            # Qator parallel so‘rovda yaratilgan
+            rows.update(count=F('count') + delta)
+
+
+def signup_series(date_from, date_to, interval):
+    """[{period, total, admins, ...}] — faqat yig‘indi jadvalidan, bo‘sh davrlar 0 bilan"""
+    period = {'day': F('day'), 'week': TruncWeek('day')}[interval]
+    rows = UserSignupDay.objects.filter(day__range=(date_from, date_to)).annotate(period=period).values(
+        'period', 'role',
+    ).annotate(total=Sum('count')).order_by()
+
+    step = timedelta(days=1 if interval == 'day' else 7)
+    start = date_from if interval == 'day' else date_from - timedelta(days=date_from.weekday())
+    series = {}
+    while start <= date_to:
+        series[start] = dict(period=start, total=0, **dict.fromkeys(ROLE_STATS_KEYS.values(), 0))
+        start += step
+    for row in rows:
+        item = series[row['period']]
+        item[ROLE_STATS_KEYS[row['role']]] += row['total']
+        item['total'] += row['total']
+    return list(series.values())
+
+
+def user_signups_changed(sender, instance, **kwargs):
+    day = timezone.localdate(instance.created_date)
+    loaded_role = getattr(instance, '_loaded_claims', {}).get('role')
+    if 'created' not in kwargs:
+        deltas = {(day, loaded_role or instance.role): -1}  # O‘chirildi
+    elif kwargs['created']:
+        deltas = {(day, instance.role): 1}
+    elif loaded_role is not None and loaded_role != instance.role:
+        deltas = {(day, loaded_role): -1, (day, instance.role): 1}
+    else:
+        return
+    adjust_signups(deltas)
+    cache.delete(USER_STATS_CACHE_KEY)
+
+
+def cache_token_versions(versions):
+    """{user_id: versiya} ni umumiy keshga yozadi (TOKEN_VERSION_CACHE_TIMEOUT = 0 bo‘lsa yozilmaydi)"""
+    if settings.TOKEN_VERSION_CACHE_TIMEOUT:
+        cache.set_many(
+            {TOKEN_VERSION_CACHE_KEY.format(user_id): version for user_id, version in versions.items()},
+            settings.TOKEN_VERSION_CACHE_TIMEOUT,
+        )
+
+
+def user_post_save(sender, instance, **kwargs):
+    # Token versiyasi umumiy keshda: faol bo‘lmagan foydalanuvchilar tokenlari -1 bilan bekor qilinadi
+    cache_token_versions({instance.pk: instance.token_version if instance.is_active else -1})
+    claims_user_rows.discard(lambda key: key[0] == instance.pk)
+
+
+def user_post_delete(sender, instance, **kwargs):
+    cache_token_versions({instance.pk: -1})
+    claims_user_rows.discard(lambda key: key[0] == instance.pk)
+
+
+# Proxy model signallari o‘z sender i bilan yuboriladi
+for sender in (User, ClaimsUser):
+    post_save.connect(user_post_save, sender=sender)
+    post_delete.connect(user_post_delete, sender=sender)
+    post_save.connect(user_signups_changed, sender=sender)
+    post_delete.connect(user_signups_changed, sender=sender)
+
+m2m_changed.connect(user_groups_changed, sender=User.groups.through)
+post_save.connect(group_changed, sender=Group)
+pre_delete.connect(group_changed, sender=Group)
@@ -1,6 +1,8 @@
 from rest_framework.permissions import BasePermission
 from rest_framework import permissions
 
+from .membership import MANAGER_GROUP, has_role, in_group, is_owned_by
+
 
 class IsAdminUser(BasePermission):
     """
@@ -14,11 +16,11 @@ class IsAdminUser(BasePermission):
 
     def has_permission(self, request, view):
         # Foydalanuvchi autentifikatsiya qilingan va admin ekanligini tekshirish
-        return request.user.is_authenticated and request.user.role == 'admin'
+        return has_role(request.user, 'admin')
 
     def has_object_permission(self, request, view, obj):
         # Muayyan ob'ekt ustida faqat admin ishlay oladi
-        return request.user.is_authenticated and request.user.role == 'admin'
+        return has_role(request.user, 'admin')
 
 
 class IsAdminOrOwner(BasePermission):
@@ -28,12 +30,8 @@ class IsAdminOrOwner(BasePermission):
     """
 
     def has_permission(self, request, view):
-        # Foydalanuvchi autentifikatsiya qilinganligini tekshirish
-        if not request.user.is_authenticated:
-            return False
-
         # Admin yoki Owner bo‘lsa, umumiy ruxsat beriladi (qo‘shish va ro‘yxatni ko‘rish uchun)
-        return request.user.role in ('admin', 'owner')
+        return has_role(request.user, 'admin', 'owner')
 
     def has_object_permission(self, request, view, obj):
         # Foydalanuvchi autentifikatsiya qilinganligini tekshirish
@@ -41,12 +39,12 @@ class IsAdminOrOwner(BasePermission):
             return False
 
         # Admin bo‘lsa, har qanday manager ustida ishlay oladi
-        if request.user.role == 'admin':
+        if has_role(request.user, 'admin'):
             return True
 
         # Owner bo‘lsa, faqat o‘zi qo‘shgan managerlar ustida ishlay oladi
-        if request.user.role == 'owner':
-            return obj.created_by == request.user
+        if has_role(request.user, 'owner'):
+            return is_owned_by(obj, request.user, 'created_by')
 
         return False
 
@@ -74,7 +72,8 @@ class CustomBookingPermission(BasePermission):
     """
     Maxsus ruxsat sinfi:
     - GET: Hamma uchun ochiq
-    - CREATE: Faqat oddiy user (is_staff=False, is_superuser=False)
+    - CREATE/recurring/hold: Faqat oddiy user (is_staff=False, is_superuser=False)
+    - confirm: Holdning o‘z egasi
     - DELETE/PUT/PATCH: Faqat 'Manager' guruhi
     """
 
@@ -87,13 +86,17 @@ class CustomBookingPermission(BasePermission):
         if not request.user.is_authenticated:
             return False
 
-        # CREATE uchun: Faqat oddiy user
-        if view.action == 'create':
+        # CREATE (shu jumladan takroriy bron va hold) uchun: Faqat oddiy user
+        if view.action in ['create', 'recurring', 'hold']:
             return not request.user.is_staff and not request.user.is_superuser
 
+        # Holdni tasdiqlash: egasi view ichida tekshiriladi
+        if view.action == 'confirm':
+            return True
+
         # DELETE, PUT, PATCH uchun: Faqat 'Manager' guruhi
         if view.action in ['destroy', 'update', 'partial_update']:
-            return request.user.groups.filter(name='Manager').exists()
+            return in_group(request.user, MANAGER_GROUP)
 
         return False
 
@@ -104,7 +107,7 @@ class CustomBookingPermission(BasePermission):
 
         # DELETE, PUT, PATCH uchun: Faqat 'Manager' guruhi
         if view.action in ['destroy', 'update', 'partial_update']:
-            return request.user.groups.filter(name='Manager').exists()
+            return in_group(request.user, MANAGER_GROUP)
 
         return False
 
@@ -114,7 +117,7 @@ class IsAuthor(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return request.user == obj.user
+        return is_owned_by(obj, request.user, 'user')
 
 
 class IsAdminOrSelf(BasePermission):
@@ -129,7 +132,7 @@ class IsAdminOrSelf(BasePermission):
             return False
 
         # Admin bo‘lsa, hamma narsaga ruxsat
-        if request.user.role == 'admin':
+        if has_role(request.user, 'admin'):
             return True
 
         # Agar foydalanuvchi oddiy user bo‘lsa, faqat o‘zini ko‘rish/o‘zgartirish uchun ruxsat
@@ -141,11 +144,11 @@ class IsAdminOrSelf(BasePermission):
             return False
 
         # Admin bo‘lsa, har qanday profil ustida ishlay oladi
-        if request.user.role == 'admin':
+        if has_role(request.user, 'admin'):
             return True
 
         # Foydalanuvchi faqat o‘z profiliga kirishi mumkin
-        return obj == request.user
+        return obj.pk == request.user.pk
 
 
 class IsAdminOrOwnerStadium(BasePermission):
@@ -163,27 +166,21 @@ class IsAdminOrOwnerStadium(BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        if not request.user.is_authenticated:
-            return False
-
-        return request.user.role in ['admin', 'owner']
+        return has_role(request.user, 'admin', 'owner')
 
     def has_object_permission(self, request, view, obj):
         # Barcha foydalanuvchilarga o‘ziga tegishli bo‘lsa ko‘rishga ruxsat beriladi
         if request.method in permissions.SAFE_METHODS:
             return (
-                    request.user.role == 'admin' or
-                    obj.owner == request.user or
-                    obj.manager == request.user
+                    has_role(request.user, 'admin') or
+                    is_owned_by(obj, request.user, 'owner') or
+                    is_owned_by(obj, request.user, 'manager')
             )
 
-        if not request.user.is_authenticated:
-            return False
-
-        if request.user.role == 'admin':
+        if has_role(request.user, 'admin'):
             return True
 
-        if request.user.role == 'owner':
-            return obj.owner == request.user
+        if has_role(request.user, 'owner'):
+            return is_owned_by(obj, request.user, 'owner')
 
         return False
\ No newline at end of file
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from .models import User, UserToken
+from .models import MAX_SIGNUP_SERIES_DAYS, User, UserToken
+from apps.serializers import DateRangeQuerySerializer
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -53,6 +54,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['phone'] = user.phone
         token['role'] = user.role  # Add role to the token
+        # ClaimsJWTAuthentication foydalanuvchini shu claimlardan tuzadi
+        token['name'] = user.name
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        token['ver'] = user.token_version
         token['created_date'] = user.created_date.strftime('%d.%m.%Y %H:%M:%S')
         return token
 
@@ -235,9 +241,41 @@ class ChangePasswordSerializer(serializers.Serializer):
 class UserListSerializer(serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
 
-    def get_created_by_name(self, obj):
+    def get_created_by_name(self, obj) -> str:
+        # created_by view da select_related bilan olinadi
         return obj.created_by.name if obj.created_by else "None"
 
     class Meta:
         model = User
-        fields = ['id', 'name', 'phone', 'role', 'is_active', 'created_date', 'created_by_name']
\ No newline at end of file
+        fields = ['id', 'name', 'phone', 'role', 'is_active', 'created_date', 'created_by_name']
+
+
+class UserStatsQuerySerializer(DateRangeQuerySerializer):
+    max_days = MAX_SIGNUP_SERIES_DAYS
+
+    interval = serializers.ChoiceField(choices=['day', 'week'], required=False)
+
+
+class SignupPeriodSerializer(serializers.Serializer):
+    period = serializers.DateField(help_text='Kun yoki hafta boshi (dushanba)')
+    total = serializers.IntegerField()
+    admins = serializers.IntegerField()
+    owners = serializers.IntegerField()
+    managers = serializers.IntegerField()
+    users = serializers.IntegerField()
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    """Import faylining bitta qatori (apps.account.importing)"""
+    name = serializers.CharField(max_length=123)
+    phone = serializers.CharField(max_length=12)
+    password = serializers.CharField(trim_whitespace=False)
+    role = serializers.ChoiceField(choices=['owner', 'manager'])
+
+
+class UserImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV (name,phone,password,role) yoki NDJSON fayl")
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False,
+                                     help_text="Standart: fayl kengaytmasidan aniqlanadi")
+    role = serializers.ChoiceField(choices=['owner', 'manager'], required=False,
+                                   help_text="Qatorda `role` bo‘lmasa ishlatiladi")
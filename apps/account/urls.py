@@ -9,7 +9,7 @@ from .views import (
     ManagerViewSet,
     UserRoleUpdateView,
     ResetPasswordView,
-    ChangePasswordView, UserListView, UserStatsView
+    ChangePasswordView, UserListView, UserStatsView, UserImportView
 )
 from rest_framework.routers import DefaultRouter
 
@@ -29,4 +29,5 @@ urlpatterns = [
     path('password/reset/', ResetPasswordView.as_view(), name='password-reset'),
     path('users/', UserListView.as_view(), name='user-list'),  # Foydalanuvchilar ro‘yxati
     path('user-stats/', UserStatsView.as_view(), name='user-stats'),  # Statistika endpointi
+    path('users/import/', UserImportView.as_view(), name='user-import'),  # Owner/managerlarni fayldan qo‘shish
 ]
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, status, permissions, viewsets
+from rest_framework import generics, serializers, status, permissions, viewsets
 from rest_framework.generics import UpdateAPIView
 from .permissions import IsAdminUser, IsAdminOrOwner, IsAdminOrReadOnly, IsAdminOrSelf
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -7,11 +8,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import SuperUserCreateSerializer, OwnerListSerializer, ManagerListSerializer, ManagerCreateSerializer, \
-    UserRoleUpdateSerializer, ResetPasswordSerializer, ChangePasswordSerializer, UserListSerializer
+    UserRoleUpdateSerializer, ResetPasswordSerializer, ChangePasswordSerializer, UserListSerializer, \
+    UserStatsQuerySerializer, SignupPeriodSerializer, UserImportSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from rest_framework.permissions import IsAuthenticated
-from apps.account.models import User, UserToken
+from apps.account.models import User, UserToken, get_user_stats, signup_series
+from apps.account.importing import UserImporter, guess_format, read_rows, text_stream
+from apps.pagination import KeysetPagination
 from apps.account.serializers import (
     UserRegisterSerializer,
     UserProfileSerializer,
@@ -251,13 +256,27 @@ class ResetPasswordView(generics.GenericAPIView):
 
 
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('created_by').order_by('-created_date', '-id')
     serializer_class = UserListSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    filterset_fields = ['role', 'is_active']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?q= bo‘yicha ism/telefon qidiruvi (relevantlik bo‘yicha saralanadi)
+        query = self.request.query_params.get('q', '').strip()
+        if query:
+            queryset = queryset.search(query)
+        return queryset
 
     @extend_schema(
         summary="Foydalanuvchilar ro‘yxatini olish",
-        description="Faqat admin foydalanuvchilar uchun mavjud. Barcha foydalanuvchilar ro‘yxatini qaytaradi."
+        description="Faqat admin foydalanuvchilar uchun mavjud. Foydalanuvchilar ro‘yxatini cursor bilan "
+                    "sahifalab qaytaradi; `role` va `is_active` bo‘yicha filtr, `q` bo‘yicha qidiruv.",
+        parameters=[
+            OpenApiParameter('q', str, description='Ism yoki telefon bo‘yicha qidiruv (qism va o‘xshashlik)'),
+        ],
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
@@ -268,34 +287,74 @@ class UserStatsView(APIView):
 
     @extend_schema(
         summary="Foydalanuvchilar statistikasi",
-        description="Umumiy foydalanuvchilar soni va rollar bo‘yicha statistikani qaytaradi. Faqat admin uchun.",
-        responses={
-            200: dict(
-                type='object',
-                properties={
-                    'total_users': dict(type='integer', description='Umumiy foydalanuvchilar soni'),
-                    'owners': dict(type='integer', description='Ownerlar soni'),
-                    'managers': dict(type='integer', description='Managerlar soni'),
-                    'users': dict(type='integer', description='Oddiy foydalanuvchilar soni'),
-                }
-            )
-        }
+        description="Umumiy foydalanuvchilar soni va rollar bo‘yicha statistikani qaytaradi (bitta so‘rov, keshlangan). "
+                    "`interval` berilsa, [from, to] oralig‘idagi kunlik/haftalik ro‘yxatdan o‘tishlar "
+                    "yig‘indi jadvalidan qo‘shib beriladi. Faqat admin uchun.",
+        parameters=[
+            OpenApiParameter('interval', str, enum=['day', 'week'], description='Vaqt qatori: kunlik yoki haftalik'),
+            OpenApiParameter('from', OpenApiTypes.DATE, description='Boshlanish sanasi, standart to - 29 kun'),
+            OpenApiParameter('to', OpenApiTypes.DATE, description='Tugash sanasi, standart bugun'),
+        ],
+        responses={200: inline_serializer('UserStats', {
+            'total_users': serializers.IntegerField(help_text='Umumiy foydalanuvchilar soni (adminlar bilan)'),
+            'admins': serializers.IntegerField(help_text='Adminlar soni'),
+            'owners': serializers.IntegerField(help_text='Ownerlar soni'),
+            'managers': serializers.IntegerField(help_text='Managerlar soni'),
+            'users': serializers.IntegerField(help_text='Oddiy foydalanuvchilar soni'),
+            'from': serializers.DateField(required=False),
+            'to': serializers.DateField(required=False),
+            'interval': serializers.CharField(required=False),
+            'series': SignupPeriodSerializer(many=True, required=False),
+        })},
     )
     def get(self, request, *args, **kwargs):
-        # Umumiy foydalanuvchilar soni
+        params = UserStatsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = dict(get_user_stats())
+
+        # Vaqt qatori faqat UserSignupDay dan o‘qiladi, User jadvali skanerlanmaydi
+        query = params.validated_data
+        if query.get('interval'):
+            data.update({
+                'from': query['from'],
+                'to': query['to'],
+                'interval': query['interval'],
+                'series': SignupPeriodSerializer(
+                    signup_series(query['from'], query['to'], query['interval']), many=True,
+                ).data,
+            })
+        return Response(data, status=status.HTTP_200_OK)
 
-        # Rollarga ko‘ra sonlar
-        owners = User.objects.filter(role='owner').count()
-        managers = User.objects.filter(role='manager').count()
-        users = User.objects.filter(role='user').count()
-        total_users = owners + managers + users
 
-        # Javob ma’lumotlari
-        data = {
-            'total_users': total_users,
-            'owners': owners,
-            'managers': managers,
-            'users': users,
-        }
+class UserImportView(APIView):
+    """Owner/manager larni fayldan ommaviy qo‘shish (faqat admin)"""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
 
-        return Response(data, status=status.HTTP_200_OK)
+    @extend_schema(
+        summary="Owner/managerlarni fayldan import qilish",
+        description="CSV (name,phone,password,role) yoki NDJSON fayl qatorma-qator o‘qiladi, foydalanuvchilar "
+                    "guruhlab qo‘shiladi. Xato qatorlar (masalan, takroriy telefon) boshqalarini to‘xtatmaydi va "
+                    "`errors` da qaytadi. USER_IMPORT_MAX_ROWS dan katta fayl hech kim qo‘shilmasdan rad etiladi "
+                    "(kattaroq fayllar uchun `import_users` buyrug‘i). Hech kim qo‘shilmasa 400.",
+        request={'multipart/form-data': UserImportSerializer},
+        responses={201: inline_serializer('UserImportReport', {
+            'created': serializers.IntegerField(),
+            'failed': serializers.IntegerField(),
+            'errors': serializers.ListField(child=serializers.DictField()),
+        })},
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = UserImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        file = data['file']
+        # So‘rov ichida barcha yadrolar band qilinmaydi
+        importer = UserImporter(
+            created_by=request.user, default_role=data.get('role'), workers=settings.USER_IMPORT_API_WORKERS,
+        )
+        report = importer.run(
+            read_rows(text_stream(file), data.get('format') or guess_format(file.name)),
+            max_rows=settings.USER_IMPORT_MAX_ROWS,
+        )
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Booking
+from django.utils import timezone
+from .models import ArchivedBooking, Booking, refresh_occupancy
 
 # Bron qilish admin
 @admin.register(Booking)
@@ -14,6 +15,7 @@ class BookingAdmin(admin.ModelAdmin):
         'end_time_display',
         'duration',
         'is_active',
+        'hold_expires_at',
         'created_date'
     )
 
@@ -48,7 +50,7 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('stadium', 'user', 'booking_date', 'start_hour', 'duration')
         }),
         ('Qo‘shimcha ma’lumotlar', {
-            'fields': ('is_active', 'created_date'),
+            'fields': ('is_active', 'hold_expires_at', 'created_date'),
             'classes': ('collapse',)  # Bu qismni yig'ib qo'yish mumkin
         }),
     )
@@ -72,7 +74,9 @@ class BookingAdmin(admin.ModelAdmin):
 
     def deactivate_bookings(self, request, queryset):
         """Tanlangan bronlarni faolsizlantirish"""
-        updated = queryset.update(is_active=False)
+        days = set(queryset.values_list('stadium_id', 'booking_date'))
+        updated = queryset.update(is_active=False, modified_date=timezone.now())
+        refresh_occupancy(days)  # update() signal yubormaydi
         self.message_user(request, f"{updated} ta bron faolsizlantirildi.")
 
     deactivate_bookings.short_description = "Tanlangan bronlarni faolsizlantirish"
@@ -83,3 +87,20 @@ class BookingAdmin(admin.ModelAdmin):
             if not obj.user:
                 obj.user = request.user  # Joriy adminni foydalanuvchi sifatida qo‘shish
         super().save_model(request, obj, form, change)
+
+
+# Arxivlangan bronlar faqat ko‘rish uchun
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('original_id', 'stadium', 'user', 'booking_date', 'start_hour', 'duration', 'archived_date')
+    list_filter = ('booking_date',)
+    search_fields = ('stadium__name', 'user__name', 'user__phone')
+    list_select_related = ('stadium', 'user')
+    ordering = ('-booking_date', '-start_hour')
+    list_per_page = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
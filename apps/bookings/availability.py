@@ -0,0 +1,117 @@
+"""
+Stadion bandligini bitmaskalar orqali hisoblash.
+
+Har bir stadion-kun bitta butun son: `h`-bit [h:00, h+1:00) soati band ekanini bildiradi.
+Bron `start_hour` dan `start_hour + duration` gacha bo‘lgan bitlarni egallaydi, ketma-ket
+`duration` soat bo‘sh bo‘lgan boshlanish soatlari esa bir nechta siljitish va AND bilan topiladi.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Booking, StadiumDayOccupancy
+
+OPEN_HOUR = 4  # Eng erta boshlanish soati (Booking.start_hour choices)
+CLOSE_HOUR = 25  # Bron shu soatdan kech tugamaydi
+MAX_RANGE_DAYS = 62
+MAX_HEATMAP_DAYS = 366
+
+
+def hours_mask(start_hour, duration):
+    """[start_hour, start_hour + duration) soatlari uchun maska"""
+    return ((1 << duration) - 1) << start_hour
+
+
+OPEN_MASK = hours_mask(OPEN_HOUR, CLOSE_HOUR - OPEN_HOUR)
+
+
+def stadium_day_masks(stadium_id, date_from, date_to):
+    """{sana: band soatlar maskasi} — barcha kunlar uchun bitta so‘rov"""
+    masks = defaultdict(int)
+    rows = Booking.objects.occupying().filter(
+        stadium_id=stadium_id,
+        booking_date__range=(date_from, date_to),
+    ).values_list('booking_date', 'start_hour', 'duration')
+    for booking_date, start_hour, duration in rows:
+        masks[booking_date] |= hours_mask(start_hour, duration)
+    return masks
+
+
+def past_mask(day, now=None):
+    """Bugun o‘tib ketgan soatlar band deb hisoblanadi"""
+    now = timezone.localtime(now)
+    if day < now.date():
+        return OPEN_MASK
+    if day > now.date():
+        return 0
+    # Boshlangan soat ham endi bron qilib bo‘lmaydi
+    passed = now.hour + (1 if (now.minute, now.second, now.microsecond) != (0, 0, 0) else 0)
+    return (1 << passed) - 1
+
+
+def free_starts(occupied, duration):
+    """Ketma-ket `duration` soat bo‘sh bo‘lgan boshlanish soatlari maskasi"""
+    free = OPEN_MASK & ~occupied
+    starts = free
+    for shift in range(1, duration):
+        starts &= free >> shift
+    return starts
+
+
+def mask_hours(mask):
+    return [hour for hour in range(OPEN_HOUR, CLOSE_HOUR) if mask >> hour & 1]
+
+
+def stadium_availability(stadium_id, date_from, date_to, duration=1):
+    """Har bir kun uchun band maska va bo‘sh boshlanish soatlari"""
+    masks = stadium_day_masks(stadium_id, date_from, date_to)
+    now = timezone.now()
+    days = []
+    day = date_from
+    while day <= date_to:
+        occupied = masks.get(day, 0)
+        starts = free_starts(occupied | past_mask(day, now), duration)
+        days.append({
+            'date': day,
+            'occupied': occupied,
+            'free_start_hours': mask_hours(starts),
+        })
+        day += timedelta(days=1)
+    return days
+
+
+def weekday_counts(date_from, date_to):
+    """Oraliqdagi har bir hafta kuni (0 — dushanba) soni"""
+    total = (date_to - date_from).days + 1
+    counts = []
+    for weekday in range(7):
+        first = (weekday - date_from.weekday()) % 7
+        counts.append(0 if first >= total else (total - 1 - first) // 7 + 1)
+    return counts
+
+
+def occupancy_heatmap(stadium_id, date_from, date_to):
+    """
+    Hafta kuni x soat jadvali: har bir katakda shu soat necha kun band bo‘lgani.
+    Faqat StadiumDayOccupancy yig‘indilaridan o‘qiladi (bir yil uchun <= 366 qator).
+    """
+    hours = range(OPEN_HOUR, CLOSE_HOUR)
+    booked = [[0] * len(hours) for _ in range(7)]
+    rows = StadiumDayOccupancy.objects.filter(
+        stadium_id=stadium_id, day__range=(date_from, date_to),
+    ).values_list('day', 'mask')
+    for day, mask in rows:
+        row = booked[day.weekday()]
+        for index, hour in enumerate(hours):
+            if mask >> hour & 1:
+                row[index] += 1
+    days = weekday_counts(date_from, date_to)
+    return {
+        'from': date_from,
+        'to': date_to,
+        'hours': list(hours),
+        'weekdays': [
+            {'weekday': weekday, 'days': days[weekday], 'booked': booked[weekday]} for weekday in range(7)
+        ],
+    }
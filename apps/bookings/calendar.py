@@ -0,0 +1,128 @@
+"""
+Bronlar jadvalini iCalendar (RFC 5545) ko‘rinishida oqim bilan berish.
+
+Kalendar ilovalari feed ni har bir necha daqiqada so‘raydi, shuning uchun:
+- ETag feed ga kiradigan bronlarning Max(modified_date) va sonidan, stadion/foydalanuvchilarning
+  Max(modified_date) idan (nomlar uchun), oyna boshi va kalendar nomidan olinadi;
+- o‘zgarmagan so‘rovga 304 qaytadi, bron qatorlari o‘qilmaydi;
+- aks holda qatorlar iterator() bilan o‘qilib, StreamingHttpResponse orqali yuboriladi.
+
+Kalendar ilovalari JWT yubora olmagani uchun feed havolasi imzolangan `token` bilan beriladi. Token
+uni olgan foydalanuvchiga va uning token_version iga bog‘langan: foydalanuvchi feed ga kirish huquqini
+yo‘qotsa (masalan, stadion menejeri almashsa), roli o‘zgarsa yoki faolsizlantirilsa, eski havolalar ishlamaydi.
+"""
+import hashlib
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.account.authentication import current_token_version
+
+TOKEN_SALT = 'bookings.calendar'
+CHUNK_SIZE = 500
+
+
+def feed_token(kind, object_id, user_id):
+    """`<user_id>.<imzo>`; imzoga foydalanuvchining amaldagi token_version i ham kiradi"""
+    value = f'{kind}:{object_id}:{user_id}:{current_token_version(user_id)}'
+    return f"{user_id}.{signing.Signer(salt=TOKEN_SALT).sign(value).rsplit(':', 1)[-1]}"
+
+
+def check_feed_token(kind, object_id, token, allowed_user_ids):
+    user_id, _, signature = (token or '').partition('.')
+    if not user_id.isdigit() or int(user_id) not in allowed_user_ids:
+        return False
+    value = f'{kind}:{object_id}:{user_id}:{current_token_version(int(user_id))}'
+    try:
+        signing.Signer(salt=TOKEN_SALT).unsign(f'{value}:{signature}')
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def feed_since():
+    return timezone.localdate() - timedelta(days=settings.BOOKING_CALENDAR_PAST_DAYS)
+
+
+def feed_filter(bookings, since):
+    # Tasdiqlanmagan holdlar kalendarga chiqmaydi
+    return bookings.filter(is_active=True, hold_expires_at__isnull=True, booking_date__gte=since)
+
+
+def feed_etag(name, bookings):
+    """
+    Feed matnini o‘zgartiradigan har qanday narsa ETag ni o‘zgartiradi: bron qo‘shish/o‘zgartirish/o‘chirish,
+    oyna boshining siljishi (yangi kun), stadion yoki foydalanuvchi nomi va kalendar nomi
+    """
+    since = feed_since()
+    state = feed_filter(bookings, since).order_by().aggregate(
+        last=Max('modified_date'), total=Count('*'),
+        stadium=Max('stadium__modified_date'), user=Max('user__modified_date'),
+    )
+    stamps = ':'.join(str(state[key].timestamp() if state[key] else 0) for key in ('last', 'stadium', 'user'))
+    return '"%s"' % hashlib.md5(f"{since}:{state['total']}:{stamps}:{name}".encode()).hexdigest()
+
+
+def feed_bookings(bookings):
+    return feed_filter(bookings, feed_since()).order_by('booking_date', 'start_hour', 'id').values_list(
+        'id', 'booking_date', 'start_hour', 'duration', 'modified_date', 'phone_add', 'stadium__name', 'user__name',
+    )
+
+
+def escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line):
+    # 75 oktetdan uzun qatorlar bo‘linadi (davomi bo‘sh joy bilan boshlanadi)
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        while cut and (encoded[cut] & 0xC0) == 0x80:  # UTF-8 belgini bo‘lmaslik
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    parts.append(encoded.decode())
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def stream_calendar(name, rows):
+    """iCalendar matnini qatorma-qator yield qiladi"""
+    host = settings.BOOKING_CALENDAR_UID_DOMAIN
+    yield fold('BEGIN:VCALENDAR')
+    yield fold('VERSION:2.0')
+    yield fold('PRODID:-//StreetSport//Bookings//UZ')
+    yield fold('CALSCALE:GREGORIAN')
+    yield fold('METHOD:PUBLISH')
+    yield fold(f'X-WR-CALNAME:{escape(name)}')
+    yield fold(f'X-WR-TIMEZONE:{settings.TIME_ZONE}')
+    for booking_id, booking_date, start_hour, duration, modified, phone, stadium_name, user_name in rows:
+        start = timezone.make_aware(datetime.combine(booking_date, time())) + timedelta(hours=start_hour)
+        yield ''.join((
+            fold('BEGIN:VEVENT'),
+            fold(f'UID:booking-{booking_id}@{host}'),
+            fold(f'DTSTAMP:{utc(modified)}'),
+            fold(f'LAST-MODIFIED:{utc(modified)}'),
+            fold(f'DTSTART:{utc(start)}'),
+            fold(f'DTEND:{utc(start + timedelta(hours=duration))}'),
+            fold(f'SUMMARY:{escape(stadium_name)} — {escape(user_name)}'),
+            fold(f'DESCRIPTION:{escape(f"Tel: {phone}")}'),
+            fold('END:VEVENT'),
+        ))
+    yield fold('END:VCALENDAR')
+
+
+def calendar_rows(bookings):
+    return feed_bookings(bookings).iterator(chunk_size=CHUNK_SIZE)
+
@@ -0,0 +1,30 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class PostgresExclusionConstraint(ExclusionConstraint):
+    """
+    Faqat PostgreSQL da yaratiladigan ExclusionConstraint. Boshqa bazalarda (SQLite) SQL chiqarmaydi
+    va validate() ni o‘tkazib yuboradi, shuning uchun jadval qayta qurilganda ham migratsiyalar ishlaydi;
+    u yerda tekshiruv modelning o‘zida bajariladi.
+    """
+
+    def constraint_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return None
+        return super().constraint_sql(model, schema_editor)
+
+    def create_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return None
+        return super().create_sql(model, schema_editor)
+
+    def remove_sql(self, model, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return None
+        return super().remove_sql(model, schema_editor)
+
+    def validate(self, model, instance, exclude=None, using=DEFAULT_DB_ALIAS):
+        if connections[using].vendor != 'postgresql':
+            return
+        super().validate(model, instance, exclude=exclude, using=using)
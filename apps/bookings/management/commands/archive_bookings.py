@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.bookings.models import ArchivedBooking, Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "O‘tib ketgan, faol bo‘lmagan bronlarni ArchivedBooking jadvaliga partiyalab ko‘chiradi. "
+        "Faol (o‘tgan) bronlar daromad va bandlik hisobotlari uchun joyida qoladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+                            help="Shuncha kundan eski bronlar ko‘chiriladi")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Faqat sonini ko‘rsatish")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        bookings = Booking.objects.filter(is_active=False, booking_date__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f"{bookings.count()} ta bron arxivlanadi ({cutoff} dan oldingi).")
+            return
+        moved = ArchivedBooking.archive(bookings, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{moved} ta bron arxivga ko‘chirildi."))
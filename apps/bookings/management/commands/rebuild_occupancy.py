@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.bookings.models import Booking, StadiumDayOccupancy, occupancy_masks
+
+
+class Command(BaseCommand):
+    help = "StadiumDayOccupancy yig‘indilarini bronlardan qaytadan hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stadium', type=int, help="Faqat shu stadion uchun")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.all()
+        occupancy = StadiumDayOccupancy.objects.all()
+        if options['stadium']:
+            bookings = bookings.filter(stadium_id=options['stadium'])
+            occupancy = occupancy.filter(stadium_id=options['stadium'])
+
+        masks = occupancy_masks(bookings)
+        with transaction.atomic():
+            occupancy.delete()
+            StadiumDayOccupancy.objects.bulk_create(
+                (StadiumDayOccupancy(stadium_id=stadium_id, day=day, mask=mask)
+                 for (stadium_id, day), mask in masks.items()),
+                batch_size=options['batch_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(masks)} ta stadion-kun yig‘indisi qayta hisoblandi."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.bookings.models import Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Muddati o‘tgan holdlarni partiyalab bo‘shatadi (is_active=False). "
+        "Cron/scheduler orqali har daqiqada ishga tushiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.BOOKING_HOLD_SWEEP_BATCH,
+                            help="Bitta UPDATE dagi qatorlar soni")
+
+    def handle(self, *args, **options):
+        released = Booking.objects.release_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{released} ta hold bo‘shatildi."))
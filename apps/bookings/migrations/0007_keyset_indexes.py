@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 05:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_alter_booking_start_hour'),
+        ('stadiums', '0008_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['booking_date', 'start_hour', 'id'], name='booking_date_hour_id_idx'),
+        ),
+    ]
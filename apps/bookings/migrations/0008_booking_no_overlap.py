@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 06:10
+
+import apps.bookings.constraints
+import django.contrib.postgres.fields.ranges
+import django.db.models.expressions
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef, Q
+
+
+def deactivate_overlaps(apps, schema_editor):
+    # Eski "tekshir, keyin yoz" yo‘li kesishuvchi faol bronlarni qoldirgan bo‘lishi mumkin, ular bilan
+    # constraint qo‘shilmaydi. Har (stadion, kun) da avval yaratilgan bron qoladi, unga kesishganlari
+    # faolsizlantiriladi va ro‘yxati chiqariladi
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Booking = apps.get_model('bookings', 'Booking')
+    active = Booking.objects.filter(is_active=True).annotate(end_hour=F('start_hour') + F('duration'))
+    clashing = active.filter(Exists(active.filter(
+        stadium_id=OuterRef('stadium_id'),
+        booking_date=OuterRef('booking_date'),
+        start_hour__lt=OuterRef('end_hour'),
+        end_hour__gt=OuterRef('start_hour'),
+    ).exclude(pk=OuterRef('pk'))))
+
+    kept = {}
+    rejected = []
+    rows = clashing.order_by('stadium_id', 'booking_date', 'id').values_list(
+        'id', 'stadium_id', 'booking_date', 'start_hour', 'duration',
+    )
+    for booking_id, stadium_id, booking_date, start_hour, duration in rows:
+        hours = kept.setdefault((stadium_id, booking_date), [])
+        if any(start < start_hour + duration and start_hour < start + length for start, length in hours):
+            rejected.append(booking_id)
+        else:
+            hours.append((start_hour, duration))
+    if rejected:
+        Booking.objects.filter(pk__in=rejected).update(is_active=False)
+        print(f"\n  booking_no_overlap: {len(rejected)} ta kesishuvchi bron faolsizlantirildi: {rejected}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        # start_hour bo‘yicha unique_together davomiylikni hisobga olmas edi
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together=set(),
+        ),
+        BtreeGistExtension(),
+        migrations.RunPython(deactivate_overlaps, migrations.RunPython.noop),
+        # Faqat PostgreSQL da yaratiladi, boshqa bazalarda kesishish Booking.save() ichida tekshiriladi
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=apps.bookings.constraints.PostgresExclusionConstraint(
+                condition=Q(is_active=True),
+                expressions=[
+                    ('stadium', '='),
+                    ('booking_date', '='),
+                    (django.db.models.expressions.Func(
+                        F('start_hour'), F('start_hour') + F('duration'), function='int4range',
+                        output_field=django.contrib.postgres.fields.ranges.IntegerRangeField(),
+                    ), '&&'),
+                ],
+                name='booking_no_overlap',
+                violation_error_message='Bu vaqt oralig‘ida allaqachon bron qilingan.',
+            ),
+        ),
+    ]
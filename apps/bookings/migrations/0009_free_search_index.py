@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 06:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_no_overlap'),
+        ('stadiums', '0008_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['booking_date', 'stadium', 'start_hour'], name='booking_date_stadium_hour_idx'),
+        ),
+    ]
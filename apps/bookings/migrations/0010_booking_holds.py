@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_free_search_index'),
+        ('stadiums', '0008_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Hold muddati'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('hold_expires_at__isnull', False), ('is_active', True)), fields=['hold_expires_at'], name='booking_hold_expiry_idx'),
+        ),
+    ]
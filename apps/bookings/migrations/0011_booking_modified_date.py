@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 06:25
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_date(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    Booking.objects.update(modified_date=F('created_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='O‘zgartirilgan sana'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['stadium', 'modified_date'], name='booking_stadium_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_occupancy(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    StadiumDayOccupancy = apps.get_model('bookings', 'StadiumDayOccupancy')
+    masks = {}
+    rows = Booking.objects.filter(is_active=True, hold_expires_at__isnull=True).values_list(
+        'stadium_id', 'booking_date', 'start_hour', 'duration',
+    )
+    for stadium_id, day, start_hour, duration in rows.iterator(chunk_size=2000):
+        masks[stadium_id, day] = masks.get((stadium_id, day), 0) | (((1 << duration) - 1) << start_hour)
+    StadiumDayOccupancy.objects.bulk_create(
+        (StadiumDayOccupancy(stadium_id=stadium_id, day=day, mask=mask) for (stadium_id, day), mask in masks.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_modified_date'),
+        ('stadiums', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StadiumDayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('mask', models.PositiveIntegerField(default=0)),
+                ('stadium', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_days', to='stadiums.stadium')),
+            ],
+            options={
+                'verbose_name': 'Kunlik bandlik',
+                'verbose_name_plural': 'Kunlik bandlik',
+                'constraints': [models.UniqueConstraint(fields=('stadium', 'day'), name='occupancy_stadium_day_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_occupancy, migrations.RunPython.noop),
+    ]
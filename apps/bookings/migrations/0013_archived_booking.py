@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_stadium_day_occupancy'),
+        ('stadiums', '0008_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True, verbose_name='Asl bron ID')),
+                ('booking_date', models.DateField(verbose_name='Bron qilingan kun')),
+                ('start_hour', models.PositiveSmallIntegerField(verbose_name='Boshlanish soati')),
+                ('duration', models.PositiveSmallIntegerField(verbose_name='Davomiyligi (soat)')),
+                ('phone_add', models.CharField(max_length=12)),
+                ('is_active', models.BooleanField(default=False, verbose_name='Faol')),
+                ('hold_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Hold muddati')),
+                ('created_date', models.DateTimeField(verbose_name='Yaratilgan sana')),
+                ('modified_date', models.DateTimeField(verbose_name='O‘zgartirilgan sana')),
+                ('archived_date', models.DateTimeField(auto_now_add=True, verbose_name='Arxivlangan sana')),
+                ('stadium', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='stadiums.stadium', verbose_name='Stadion')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Arxivlangan bron',
+                'verbose_name_plural': 'Arxivlangan bronlar',
+                'indexes': [models.Index(fields=['stadium', 'booking_date'], name='archived_stadium_date_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,118 @@
+from django.contrib.postgres.fields import IntegerRangeField, RangeOperators
 from django.db import models
 from apps.account.models import User
-from apps.stadiums.models import Stadium
-from django.db.models import Q
+from apps.stadiums.models import Stadium, invalidate_statistics_totals
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.db.models.signals import post_save, post_delete
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Func, Q
+from .constraints import PostgresExclusionConstraint
+
+OVERLAP_CONSTRAINT = 'booking_no_overlap'
+OVERLAP_MESSAGE = "Bu vaqt oralig‘ida allaqachon bron qilingan."
+
+
+def is_overlap_error(error):
+    """IntegrityError `booking_no_overlap` constraint buzilishidanmi"""
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None and getattr(diag, 'constraint_name', None):
+        return diag.constraint_name == OVERLAP_CONSTRAINT
+    return OVERLAP_CONSTRAINT in str(error)
+
+
+class BookingQuerySet(models.QuerySet):
+    def occupying(self):
+        """Vaqtni band qilib turgan bronlar: faol bronlar va muddati o‘tmagan holdlar"""
+        return self.filter(is_active=True).filter(
+            Q(hold_expires_at__isnull=True) | Q(hold_expires_at__gt=timezone.now())
+        )
+
+    def expired_holds(self, now=None):
+        return self.filter(is_active=True, hold_expires_at__lte=now or timezone.now())
+
+    def release_expired(self, batch_size=None, now=None):
+        """
+        Muddati o‘tgan holdlarni bo‘shatadi (is_active=False), bo‘shatilganlar sonini qaytaradi.
+        batch_size berilsa, har bir UPDATE ko‘pi bilan shuncha qatorni qamraydi; nomzodlar
+        `booking_hold_expiry_idx` qisman indeksi bo‘yicha olinadi.
+        """
+        now = now or timezone.now()
+        expired = self.expired_holds(now)
+        if batch_size is None:
+            return expired.update(is_active=False, modified_date=now)
+        released = 0
+        while True:
+            ids = list(expired.order_by('hold_expires_at').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return released
+            released += self.model.objects.using(self.db).filter(pk__in=ids, is_active=True).update(
+                is_active=False, modified_date=now,
+            )
+
+    def overlapping(self, stadium_id, booking_date, start_hour, duration):
+        """[start_hour, start_hour + duration) oralig‘i bilan kesishadigan faol bronlar"""
+        return self.occupying().annotate(end_hour=F('start_hour') + F('duration')).filter(
+            stadium_id=stadium_id,
+            booking_date=booking_date,
+            start_hour__lt=start_hour + duration,
+            end_hour__gt=start_hour,
+        )
+
+    def book_many(self, stadium_id, user, dates, start_hour, duration, phone_add, all_or_nothing=False):
+        """
+        Bir xil vaqtdagi bir nechta sanani bitta tranzaksiyada bron qiladi.
+
+        Barcha sanalar uchun kesishishlar bitta so‘rovda tekshiriladi, bo‘shlari bulk_create
+        bilan qo‘shiladi. {sana: bron yoki 'past'/'conflict'/'skipped'} lug‘atini qaytaradi.
+        """
+        now = timezone.now()
+        # Sweeper hali yetib kelmagan holdlar exclusion constraint ga xalaqit bermasin
+        self.filter(stadium_id=stadium_id, booking_date__in=dates).release_expired(now=now)
+        results = {}
+        pending = []
+        for booking_date in dates:
+            booking = self.model(
+                stadium_id=stadium_id, user=user, booking_date=booking_date,
+                start_hour=start_hour, duration=duration, phone_add=phone_add,
+            )
+            if booking.starts_at < now:
+                results[booking_date] = 'past'
+            else:
+                pending.append(booking)
+
+        # Parallel bron constraint ni buzsa, band sanalar qayta o‘qilib yana urinib ko‘riladi
+        for attempt in range(3):
+            busy = set(self.occupying().annotate(end_hour=F('start_hour') + F('duration')).filter(
+                stadium_id=stadium_id,
+                booking_date__in=[booking.booking_date for booking in pending],
+                start_hour__lt=start_hour + duration,
+                end_hour__gt=start_hour,
+            ).values_list('booking_date', flat=True))
+            free = [booking for booking in pending if booking.booking_date not in busy]
+            if all_or_nothing and len(free) < len(pending):
+                free = []
+            try:
+                with transaction.atomic(using=self.db):
+                    created = self.bulk_create(free)
+            except IntegrityError as exc:
+                if not is_overlap_error(exc) or attempt == 2:
+                    raise
+                continue
+            break
+
+        booked = {booking.booking_date for booking in created}
+        for booking in pending:
+            if booking.booking_date in booked:
+                results[booking.booking_date] = booking
+            else:
+                # all_or_nothing da bo‘sh, lekin boshqa sana band bo‘lgani uchun qo‘shilmaganlar
+                results[booking.booking_date] = 'conflict' if booking.booking_date in busy else 'skipped'
+        if created:
+            # bulk_create post_save signalini yubormaydi
+            invalidate_statistics_totals(sender=self.model)
+            refresh_occupancy((stadium_id, booking_date) for booking_date in booked)
+        return results
 
 
 class Booking(models.Model):
@@ -35,47 +144,239 @@ class Booking(models.Model):
     )
     phone_add = models.CharField(max_length=12,)
     is_active = models.BooleanField(default=True,verbose_name="Faol")
+    # To‘lov tugaguncha vaqtincha band qilish; NULL — tasdiqlangan bron
+    hold_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Hold muddati")
     created_date = models.DateTimeField(auto_now_add=True,verbose_name="Yaratilgan sana")
+    # Kalendar ETag i uchun; queryset.update() larda qo‘lda yangilanadi
+    modified_date = models.DateTimeField(auto_now=True, verbose_name="O‘zgartirilgan sana")
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
-        unique_together = ('stadium', 'booking_date', 'start_hour')
+        constraints = [
+            # Kesishuvchi faol bronlarga yo‘l qo‘ymaydi (btree_gist). Faqat PostgreSQL da yaratiladi,
+            # boshqa bazalarda kesishish save()/clean() da tekshiriladi
+            PostgresExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    ('stadium', RangeOperators.EQUAL),
+                    ('booking_date', RangeOperators.EQUAL),
+                    (Func(F('start_hour'), F('start_hour') + F('duration'), function='int4range',
+                          output_field=IntegerRangeField()), RangeOperators.OVERLAPS),
+                ],
+                condition=Q(is_active=True),
+                violation_error_message=OVERLAP_MESSAGE,
+            ),
+        ]
+        indexes = [
+            # Keyset sahifalash tartibi: (booking_date, start_hour, id)
+            models.Index(fields=['booking_date', 'start_hour', 'id'], name='booking_date_hour_id_idx'),
+            # "Shu vaqtda bo‘sh stadionlar" qidiruvidagi NOT EXISTS uchun
+            models.Index(fields=['booking_date', 'stadium', 'start_hour'], name='booking_date_stadium_hour_idx',
+                         condition=Q(is_active=True)),
+            # Kalendar ETag i: Max(modified_date) va Count faqat indeksdan o‘qiladi
+            models.Index(fields=['stadium', 'modified_date'], name='booking_stadium_modified_idx'),
+            # Sweeper faqat faol holdlarni ko‘radi, butun jadvalni emas
+            models.Index(fields=['hold_expires_at'], name='booking_hold_expiry_idx',
+                         condition=Q(is_active=True, hold_expires_at__isnull=False)),
+        ]
         verbose_name = "Bron"
         verbose_name_plural = "Bronlar"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Sana/stadion o‘zgarsa, eski kunning bandlik yig‘indisi ham yangilanishi uchun
+        instance._loaded_day = (instance.__dict__.get('stadium_id'), instance.__dict__.get('booking_date'))
+        return instance
+
     def __str__(self):
         end_hour = self.start_hour + self.duration
         return f"{self.user} - {self.stadium.name} ({self.booking_date} {self.start_hour:02d}:00-{end_hour:02d}:00)"
 
     def clean(self):
-        """Validate booking doesn't overlap with existing bookings"""
-        if not self.pk:  # Only check for new bookings
-            end_hour = self.start_hour + self.duration
-            overlapping = Booking.objects.filter(
-                stadium=self.stadium,
-                booking_date=self.booking_date,
-                is_active=True
-            ).filter(
-                Q(start_hour__lt=end_hour) &
-                Q(start_hour__gte=self.start_hour - self.duration)
-            ).exclude(pk=self.pk)
-
-            if overlapping.exists():
-                raise ValidationError(
-                    "Bu vaqt band qilingan. Boshqa vaqtni tanlang."
-                )
+        """O‘tgan vaqtni bron qilishni va (forma orqali) kesishuvchi bronlarni tekshiradi"""
+        self.validate_not_past()
+        if not self.overlap_constraint_enabled():
+            self.validate_overlap()
 
-            # Vaqtni to'g'ri solishtirish uchun timezone.now() dan foydalanamiz
-            booking_datetime = timezone.datetime.combine(
-                self.booking_date,
-                timezone.datetime.strptime(f"{self.start_hour}:00", "%H:%M").time()
-            )
-            # Agar vaqt zonasi yo'q bo'lsa, uni qo'shamiz
-            if not timezone.is_aware(booking_datetime):
-                booking_datetime = timezone.make_aware(booking_datetime)
+    def overlap_constraint_enabled(self, using=None):
+        using = using or router.db_for_write(Booking, instance=self)
+        return connections[using].vendor == 'postgresql'
+
+    @property
+    def starts_at(self):
+        # start_hour 24 bo‘lishi mumkin, shuning uchun soatlar timedelta sifatida qo‘shiladi
+        start = timezone.datetime.combine(self.booking_date, timezone.datetime.min.time())
+        return timezone.make_aware(start) + timezone.timedelta(hours=self.start_hour)
+
+    def validate_not_past(self):
+        if not self.pk and self.starts_at < timezone.now():  # Only check for new bookings
+            raise ValidationError("O'tgan vaqtni bron qilib bo'lmaydi")
+
+    def validate_overlap(self):
+        if self.is_active and Booking.objects.overlapping(
+                self.stadium_id, self.booking_date, self.start_hour, self.duration
+        ).exclude(pk=self.pk).exists():
+            raise ValidationError({'start_hour': OVERLAP_MESSAGE})
 
-            if booking_datetime < timezone.now():
-                raise ValidationError("O'tgan vaqtni bron qilib bo'lmaydi")
     def save(self, *args, **kwargs):
-        self.full_clean()  # Run validation before saving
-        super().save(*args, **kwargs)
+        # So‘rovsiz tekshiruvlar; FK lar bazaning o‘zida tekshiriladi
+        self.clean_fields(exclude=['stadium', 'user'])
+        self.validate_not_past()
+
+        using = kwargs.get('using') or router.db_for_write(Booking, instance=self)
+        if not self.overlap_constraint_enabled(using):
+            self.validate_overlap()
+
+        for attempt in range(2):
+            try:
+                # Savepoint: xatodan keyin tashqi tranzaksiya ishlashda davom etadi
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError as exc:
+                if not is_overlap_error(exc):
+                    raise
+                # Vaqtni muddati o‘tgan, lekin hali bo‘shatilmagan hold egallab turgan bo‘lishi mumkin
+                if attempt or not Booking.objects.using(using).filter(
+                        stadium_id=self.stadium_id, booking_date=self.booking_date
+                ).release_expired():
+                    raise ValidationError({'start_hour': OVERLAP_MESSAGE})
+
+
+
+class StadiumDayOccupancy(models.Model):
+    """
+    Stadionning bir kunlik bandlik yig‘indisi: `mask` ning h-biti [h:00, h+1:00) soati
+    tasdiqlangan faol bron bilan band ekanini bildiradi. Bronlar o‘zgarganda yangilanadi,
+    `rebuild_occupancy` buyrug‘i bilan qaytadan hisoblanadi.
+    """
+    stadium = models.ForeignKey(Stadium, on_delete=models.CASCADE, related_name='occupancy_days')
+    day = models.DateField()
+    mask = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stadium', 'day'], name='occupancy_stadium_day_uniq'),
+        ]
+        verbose_name = "Kunlik bandlik"
+        verbose_name_plural = "Kunlik bandlik"
+
+    def __str__(self):
+        return f"{self.stadium_id} - {self.day}"
+
+
+class ArchivedBooking(models.Model):
+    """
+    Eski, faol bo‘lmagan bronlar arxivi (`archive_bookings` buyrug‘i ko‘chiradi).
+    Asosiy Booking jadvali va uning indekslari joriy va kelgusi kunlar bilan kichik qoladi.
+    """
+    original_id = models.PositiveBigIntegerField(unique=True, verbose_name="Asl bron ID")
+    stadium = models.ForeignKey(
+        Stadium, on_delete=models.CASCADE, related_name='archived_bookings', verbose_name="Stadion"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='archived_bookings', verbose_name="Foydalanuvchi"
+    )
+    booking_date = models.DateField(verbose_name="Bron qilingan kun")
+    start_hour = models.PositiveSmallIntegerField(verbose_name="Boshlanish soati")
+    duration = models.PositiveSmallIntegerField(verbose_name="Davomiyligi (soat)")
+    phone_add = models.CharField(max_length=12)
+    is_active = models.BooleanField(default=False, verbose_name="Faol")
+    hold_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Hold muddati")
+    created_date = models.DateTimeField(verbose_name="Yaratilgan sana")
+    modified_date = models.DateTimeField(verbose_name="O‘zgartirilgan sana")
+    archived_date = models.DateTimeField(auto_now_add=True, verbose_name="Arxivlangan sana")
+
+    ARCHIVED_FIELDS = ('stadium_id', 'user_id', 'booking_date', 'start_hour', 'duration', 'phone_add',
+                       'is_active', 'hold_expires_at', 'created_date', 'modified_date')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stadium', 'booking_date'], name='archived_stadium_date_idx'),
+        ]
+        verbose_name = "Arxivlangan bron"
+        verbose_name_plural = "Arxivlangan bronlar"
+
+    def __str__(self):
+        return f"#{self.original_id} {self.booking_date} {self.start_hour:02d}:00"
+
+    @classmethod
+    def archive(cls, bookings, batch_size=1000):
+        """
+        Bronlarni partiyalab arxivga ko‘chiradi: har bir partiya bitta tranzaksiyada
+        (SELECT ... FOR UPDATE SKIP LOCKED, bulk INSERT, DELETE). Ko‘chirilganlar sonini qaytaradi.
+        """
+        moved = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    bookings.order_by('id').select_for_update(skip_locked=True)
+                    .values('id', *cls.ARCHIVED_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    return moved
+                ids = [row['id'] for row in rows]
+                cls.objects.bulk_create(
+                    [cls(original_id=row.pop('id'), **row) for row in rows],
+                    ignore_conflicts=True,  # Avvalgi yugurish yarim yo‘lda to‘xtagan bo‘lsa
+                )
+                Booking.objects.filter(pk__in=ids).delete()
+            moved += len(ids)
+
+
+def occupancy_masks(bookings):
+    """{(stadium_id, kun): maska} — tasdiqlangan faol bronlardan"""
+    from .availability import hours_mask
+
+    masks = {}
+    rows = bookings.filter(is_active=True, hold_expires_at__isnull=True).values_list(
+        'stadium_id', 'booking_date', 'start_hour', 'duration',
+    )
+    for stadium_id, day, start_hour, duration in rows.iterator(chunk_size=2000):
+        masks[stadium_id, day] = masks.get((stadium_id, day), 0) | hours_mask(start_hour, duration)
+    return masks
+
+
+def refresh_occupancy(keys):
+    """Berilgan (stadium_id, kun) juftliklari uchun yig‘indini bronlardan qayta hisoblaydi"""
+    days_by_stadium = {}
+    for stadium_id, day in keys:
+        days_by_stadium.setdefault(stadium_id, set()).add(day)
+    rows = []
+    empty = Q()
+    for stadium_id, days in days_by_stadium.items():
+        masks = occupancy_masks(Booking.objects.filter(stadium_id=stadium_id, booking_date__in=days))
+        rows.extend(
+            StadiumDayOccupancy(stadium_id=stadium_id, day=day, mask=masks[stadium_id, day])
+            for day in days if (stadium_id, day) in masks
+        )
+        # Bo‘sh kunlar saqlanmaydi (stadion o‘chirilganda ham xatosiz)
+        empty_days = [day for day in days if (stadium_id, day) not in masks]
+        if empty_days:
+            empty |= Q(stadium_id=stadium_id, day__in=empty_days)
+    if empty:
+        StadiumDayOccupancy.objects.filter(empty).delete()
+    if rows:
+        StadiumDayOccupancy.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['stadium', 'day'], update_fields=['mask'],
+        )
+
+
+def booking_occupancy_changed(sender, instance, **kwargs):
+    if 'created' not in kwargs and (not instance.is_active or instance.hold_expires_at):
+        return  # O‘chirilgan bron vaqtni band qilmagan edi (masalan, arxivlash)
+    keys = {(instance.stadium_id, instance.booking_date)}
+    loaded_day = getattr(instance, '_loaded_day', None)
+    if loaded_day is not None:
+        keys.add(loaded_day)
+    instance._loaded_day = (instance.stadium_id, instance.booking_date)
+    # Tranzaksiya muvaffaqiyatli tugagach, bir martada
+    transaction.on_commit(lambda: refresh_occupancy(keys))
+
 
+post_save.connect(invalidate_statistics_totals, sender=Booking)
+post_delete.connect(invalidate_statistics_totals, sender=Booking)
+post_save.connect(booking_occupancy_changed, sender=Booking)
+post_delete.connect(booking_occupancy_changed, sender=Booking)
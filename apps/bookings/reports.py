@@ -0,0 +1,70 @@
+"""
+Daromad hisobotlari: tushum = Stadium.price * Booking.duration (tasdiqlangan faol bronlar).
+Guruhlash SQL da, eksport esa qatorlarni iterator(chunk_size=...) bilan oqim qilib beradi.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import Booking
+
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORT_DAYS = 366
+GROUP_BY = ('stadium', 'day', 'week', 'month')
+EXPORT_FIELDS = ('id', 'booking_date', 'start_hour', 'duration', 'stadium_id', 'stadium_name', 'price',
+                 'user_name', 'revenue')
+
+revenue = ExpressionWrapper(F('stadium__price') * F('duration'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def revenue_bookings(user, date_from, date_to, stadium_id=None):
+    """Hisobotga kiradigan bronlar: admin — barchasi, owner — faqat o‘z stadionlari"""
+    bookings = Booking.objects.filter(
+        is_active=True, hold_expires_at__isnull=True, booking_date__range=(date_from, date_to),
+    )
+    if user.role != 'admin':
+        bookings = bookings.filter(stadium__owner=user)
+    if stadium_id:
+        bookings = bookings.filter(stadium_id=stadium_id)
+    return bookings
+
+
+def revenue_report(bookings, group_by):
+    """(jami, guruhlar ro‘yxati) — ikkalasi ham bitta agregat so‘rov"""
+    totals = {'bookings': Count('id'), 'hours': Sum('duration'), 'revenue': Sum(revenue)}
+    if group_by == 'stadium':
+        rows = bookings.values('stadium_id', name=F('stadium__name')).annotate(**totals).order_by('-revenue', 'stadium_id')
+    else:
+        period = {'day': F('booking_date'), 'week': TruncWeek('booking_date'), 'month': TruncMonth('booking_date')}
+        rows = bookings.annotate(period=period[group_by]).values('period').annotate(**totals).order_by('period')
+    summary = bookings.aggregate(**totals)
+    return summary, list(rows)
+
+
+def export_rows(bookings):
+    return bookings.order_by('booking_date', 'start_hour', 'id').values_list(
+        'id', 'booking_date', 'start_hour', 'duration', 'stadium_id', 'stadium__name', 'stadium__price',
+        'user__name', revenue,
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """csv.writer uchun: yozilgan qatorni saqlamasdan qaytaradi"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
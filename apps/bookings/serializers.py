@@ -1,11 +1,16 @@
+from .availability import MAX_RANGE_DAYS
 from .models import Booking
+from .reports import GROUP_BY, MAX_REPORT_DAYS
 from rest_framework import serializers
-from django.utils import timezone
-from datetime import datetime
+from django.core.exceptions import ValidationError as DjangoValidationError
+from datetime import datetime, timedelta
 
 from ..account.models import User
 from ..account.serializers import UserSerializer
 from ..stadiums.serializers import StadiumGetSerializer
+from apps.serializers import DateRangeQuerySerializer
+
+MAX_OCCURRENCES = 52  # Bitta so‘rovda ko‘pi bilan bir yillik haftalik bron
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -14,15 +19,13 @@ class BookingSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Booking
-        fields = ['id', 'stadium', 'user', 'booking_date', 'start_hour', 'duration']
-        read_only_fields = ['user', 'stadium']  # Ushbu maydonlar faqat o‘qish uchun
+        fields = ['id', 'stadium', 'user', 'booking_date', 'start_hour', 'duration', 'phone_add', 'hold_expires_at']
+        read_only_fields = ['user', 'stadium', 'hold_expires_at']  # Ushbu maydonlar faqat o‘qish uchun
 
     def validate(self, attrs):
-        # Stadion kontekstdan olinadi yoki attrs dan
-        stadium = self.context['stadium'] if 'stadium' in self.context else attrs.get('stadium')
-        booking_date = attrs.get('booking_date')
-        start_hour = attrs.get('start_hour')
-        duration = attrs.get('duration', 1)
+        # Qisman yangilashda yetishmagan qiymatlar mavjud brondan olinadi
+        start_hour = attrs.get('start_hour', getattr(self.instance, 'start_hour', 12))
+        duration = attrs.get('duration', getattr(self.instance, 'duration', 1))
 
         # Soat 08:00-21:00 oralig‘ida bo‘lishi kerak (4 dan 24 gacha)
         if start_hour < 4 or start_hour > 24:
@@ -33,26 +36,37 @@ class BookingSerializer(serializers.ModelSerializer):
         if end_hour > 25:
             raise serializers.ValidationError({"duration": "Bron 21:00 dan keyin tugashi mumkin emas."})
 
-        # Takroriy bronlarni tekshirish
-        existing_bookings = Booking.objects.filter(
-            stadium=stadium,
-            booking_date=booking_date,
-            is_active=True
-        ).exclude(id=self.instance.id if self.instance else None)
-
-        for booking in existing_bookings:
-            existing_end = booking.start_hour + booking.duration
-            new_end = start_hour + duration
-            if start_hour < existing_end and new_end > booking.start_hour:
-                raise serializers.ValidationError({"start_hour": "Bu vaqt oralig‘ida allaqachon bron qilingan."})
-
+        # Kesishuvchi bronlar oldindan o‘qilmaydi: ularga bazadagi exclusion constraint
+        # yo‘l qo‘ymaydi, xatosi esa _save() da start_hour xatosiga aylantiriladi
         return attrs
 
     def create(self, validated_data):
         user = self.context['request'].user  # Joriy foydalanuvchi
         validated_data['user'] = user
         validated_data['stadium'] = self.context['stadium']
-        return super().create(validated_data)
+        return self._save(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._save(super().update, instance, validated_data)
+
+    @staticmethod
+    def _save(method, *args):
+        try:
+            return method(*args)
+        except DjangoValidationError as exc:
+            # Booking.save() dagi xatolar (shu jumladan kesishish) 500 emas, 400 bo‘lib qaytadi
+            raise serializers.ValidationError(serializers.as_serializer_error(exc))
+
+
+class BookingListSerializer(serializers.ModelSerializer):
+    """Ro‘yxat uchun: stadion faqat id sifatida, foydalanuvchi select_related orqali"""
+    user = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'stadium', 'user', 'booking_date', 'start_hour', 'duration', 'phone_add', 'is_active',
+                  'hold_expires_at']
+        read_only_fields = fields
 
 
 class BookingDetailSerializer(serializers.ModelSerializer):
@@ -62,5 +76,65 @@ class BookingDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = ['id', 'stadium', 'user', 'booking_date', 'start_hour',
-                  'duration', 'phone_add', 'is_active', 'created_date']
-        read_only_fields = ['user', 'stadium', 'created_date']
+                  'duration', 'phone_add', 'is_active', 'hold_expires_at', 'created_date']
+        read_only_fields = ['user', 'stadium', 'hold_expires_at', 'created_date']
+
+
+class AvailabilityQuerySerializer(DateRangeQuerySerializer):
+    default_days = 7
+    max_days = MAX_RANGE_DAYS
+    forward = True
+
+    duration = serializers.ChoiceField(choices=[1, 2, 3], required=False, default=1)
+
+
+class AvailabilityDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    occupied = serializers.IntegerField(help_text="Band soatlar bitmaskasi: h-bit [h:00, h+1:00) soati")
+    free_start_hours = serializers.ListField(child=serializers.IntegerField())
+
+
+class RecurringBookingSerializer(serializers.Serializer):
+    """Har hafta bir xil vaqt (`start_date` + `weeks`) yoki aniq sanalar ro‘yxati (`dates`)"""
+    start_date = serializers.DateField(required=False)
+    weeks = serializers.IntegerField(required=False, default=1, min_value=1, max_value=MAX_OCCURRENCES)
+    dates = serializers.ListField(child=serializers.DateField(), required=False, min_length=1,
+                                  max_length=MAX_OCCURRENCES)
+    start_hour = serializers.ChoiceField(choices=Booking._meta.get_field('start_hour').choices)
+    duration = serializers.ChoiceField(choices=Booking._meta.get_field('duration').choices, default=1)
+    phone_add = serializers.CharField(max_length=12)
+    all_or_nothing = serializers.BooleanField(default=False, help_text="Bitta sana band bo‘lsa, hech biri bron qilinmaydi")
+
+    def validate(self, attrs):
+        if attrs['start_hour'] + attrs['duration'] > 25:
+            raise serializers.ValidationError({"duration": "Bron 21:00 dan keyin tugashi mumkin emas."})
+        if 'dates' in attrs:
+            attrs['dates'] = sorted(set(attrs['dates']))
+        elif 'start_date' in attrs:
+            attrs['dates'] = [attrs['start_date'] + timedelta(weeks=week) for week in range(attrs['weeks'])]
+        else:
+            raise serializers.ValidationError({"dates": "start_date yoki dates berilishi kerak."})
+        return attrs
+
+
+class RecurringBookingResultSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=['booked', 'conflict', 'past', 'skipped'])
+    id = serializers.IntegerField(allow_null=True)
+
+
+class RevenueQuerySerializer(DateRangeQuerySerializer):
+    max_days = MAX_REPORT_DAYS
+
+    group_by = serializers.ChoiceField(choices=GROUP_BY, required=False, default='stadium')
+    stadium = serializers.IntegerField(required=False, min_value=1)
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False, default='csv')
+
+
+class RevenueRowSerializer(serializers.Serializer):
+    stadium_id = serializers.IntegerField(required=False)
+    name = serializers.CharField(required=False)
+    period = serializers.DateField(required=False)
+    bookings = serializers.IntegerField()
+    hours = serializers.IntegerField(allow_null=True)
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2, allow_null=True)
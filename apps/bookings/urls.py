@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import (
+    BookingViewSet, StadiumAvailabilityView, StadiumCalendarView, ManagerCalendarView, CalendarFeedListView,
+    RevenueReportView, RevenueExportView,
+)
 
 # router = DefaultRouter()
 # router.register(r'bookings', BookingViewSet, basename='booking')
@@ -12,9 +15,35 @@ urlpatterns = [
          BookingViewSet.as_view({'get': 'list', 'post': 'create'}),
          name='booking-list'),
 
+    # Bir nechta sana (masalan, har seshanba 12 hafta) uchun bitta so‘rovda bron
+    path('stadiums/<int:stadium_id>/bookings/recurring/',
+         BookingViewSet.as_view({'post': 'recurring'}),
+         name='booking-recurring'),
+
+    # To‘lov paytida vaqtni vaqtincha band qilish va tasdiqlash
+    path('stadiums/<int:stadium_id>/bookings/hold/',
+         BookingViewSet.as_view({'post': 'hold'}),
+         name='booking-hold'),
+    path('stadiums/<int:stadium_id>/bookings/<int:pk>/confirm/',
+         BookingViewSet.as_view({'post': 'confirm'}),
+         name='booking-confirm'),
+
     # Bitta bronni ko‘rish, o‘zgartirish va o‘chirish
     path('stadiums/<int:stadium_id>/bookings/<int:pk>/',
          BookingViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}),
          name='booking-detail'),
 
+    # Stadionning kunlar bo‘yicha bo‘sh soatlari
+    path('stadiums/<int:stadium_id>/availability/', StadiumAvailabilityView.as_view(),
+         name='stadium-availability'),
+
+    # Kalendar ilovalari uchun iCalendar feedlari
+    path('stadiums/<int:object_id>/calendar.ics', StadiumCalendarView.as_view(), name='stadium-calendar'),
+    path('managers/<int:object_id>/calendar.ics', ManagerCalendarView.as_view(), name='manager-calendar'),
+    path('calendar/feeds/', CalendarFeedListView.as_view(), name='calendar-feeds'),
+
+    # Daromad hisoboti va eksporti (admin/owner)
+    path('reports/revenue/', RevenueReportView.as_view(), name='revenue-report'),
+    path('reports/revenue/export/', RevenueExportView.as_view(), name='revenue-export'),
+
 ]
@@ -1,29 +1,59 @@
 # ViewSet
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Booking
-from .serializers import BookingSerializer, BookingDetailSerializer
-from apps.account.permissions import CustomBookingPermission
-from ..account import serializers
-from ..stadiums.models import Stadium
-from drf_spectacular.utils import extend_schema
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.views import APIView
+from django.db.models import Q
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
+from django.shortcuts import get_object_or_404
+from .availability import stadium_availability
+from .calendar import calendar_rows, check_feed_token, feed_etag, feed_token, stream_calendar
+from .models import Booking, refresh_occupancy
+from .reports import GROUP_BY, export_rows, revenue_bookings, revenue_report, stream_csv, stream_ndjson
+from .serializers import (
+    BookingSerializer, BookingDetailSerializer, BookingListSerializer, AvailabilityQuerySerializer, AvailabilityDaySerializer,
+    RecurringBookingSerializer, RecurringBookingResultSerializer, RevenueQuerySerializer, RevenueRowSerializer,
+)
+from apps.account.permissions import CustomBookingPermission, IsAdminOrOwner
+from apps.pagination import KeysetPagination
+from rest_framework import serializers
+from ..account.models import User
+from ..stadiums.models import Stadium, stadium_read_prefetch
+from ..stadiums.serializers import StadiumGetSerializer
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, inline_serializer
 
 
 class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.all().order_by('booking_date', 'start_hour')
+    queryset = Booking.objects.select_related('user').prefetch_related(
+        stadium_read_prefetch()).order_by('booking_date', 'start_hour', 'id')
     permission_classes = [CustomBookingPermission]
+    pagination_class = KeysetPagination  # (booking_date, start_hour, id) bo‘yicha
 
     def get_serializer_class(self):
         # Agar bitta bron ko‘rilsa, BookingDetailSerializer ishlatiladi
         if self.action == 'retrieve':
             return BookingDetailSerializer
+        # Ro‘yxatda stadion har bir bronda takrorlanmaydi
+        if self.action == 'list':
+            return BookingListSerializer
         # Aks holda BookingSerializer ishlatiladi
         return BookingSerializer
 
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        if self.action == 'list':
+            queryset = queryset.prefetch_related(None)  # Stadion javob konvertida bir marta beriladi
 
         # Rolga qarab filtr
         if user.is_superuser or user.role == 'admin':
@@ -50,13 +80,298 @@ class BookingViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         stadium_id = self.kwargs.get('stadium_id') or self.request.query_params.get('stadium_id')
-        if stadium_id:
+        # Stadion obyekti faqat yangi bron yaratishda kerak
+        if stadium_id and self.action in ('create', 'hold'):
             try:
-                stadium = Stadium.objects.get(id=stadium_id)
+                stadium = Stadium.objects.for_read().get(id=stadium_id)
                 context['stadium'] = stadium
             except Stadium.DoesNotExist:
                 raise serializers.ValidationError({"stadium": "Bunday stadion topilmadi."})
         return context
 
+    @extend_schema(
+        description="Bronlar ixcham ko‘rinishda (stadion faqat id). Stadion ma’lumoti javobning "
+                    "`stadium` kalitida bir marta qaytadi.",
+        responses={200: BookingListSerializer(many=True)},
+    )
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        stadium_id = self.kwargs.get('stadium_id') or self.request.query_params.get('stadium_id')
+        if stadium_id and isinstance(response.data, dict):
+            stadium = get_object_or_404(Stadium.objects.for_read(), pk=stadium_id)
+            response.data['stadium'] = StadiumGetSerializer(stadium, context=self.get_serializer_context()).data
+        return response
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)  # Yangi bronni joriy foydalanuvchi uchun saqlash
+        extra = {}
+        if self.action == 'hold':
+            extra['hold_expires_at'] = timezone.now() + timedelta(seconds=settings.BOOKING_HOLD_TTL)
+        serializer.save(user=self.request.user, **extra)  # Yangi bronni joriy foydalanuvchi uchun saqlash
+
+    @extend_schema(
+        summary="Vaqtni vaqtincha band qilish (hold)",
+        description="To‘lov jarayonida vaqtni `BOOKING_HOLD_TTL` soniyaga band qiladi. Hold boshqa bronlar va "
+                    "bo‘sh vaqtlar uchun band hisoblanadi; `confirm` qilinmasa muddati o‘tgach bo‘shatiladi.",
+        request=BookingSerializer,
+        responses={201: BookingSerializer},
+    )
+    def hold(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
+
+    @extend_schema(
+        summary="Holdni tasdiqlash",
+        description="Muddati o‘tmagan holdni doimiy bronga aylantiradi.",
+        request=None,
+        responses={200: BookingDetailSerializer},
+    )
+    def confirm(self, request, stadium_id=None, pk=None):
+        # Bitta shartli UPDATE: sweeper bilan poyga bo‘lmaydi
+        now = timezone.now()
+        confirmed = Booking.objects.filter(
+            pk=pk, stadium_id=stadium_id, user=request.user, is_active=True, hold_expires_at__gt=now
+        ).update(hold_expires_at=None, modified_date=now)
+        if not confirmed:
+            return Response({"detail": "Hold topilmadi yoki muddati tugagan."}, status=status.HTTP_409_CONFLICT)
+        booking = get_object_or_404(self.get_queryset(), pk=pk)
+        refresh_occupancy([(booking.stadium_id, booking.booking_date)])
+        return Response(BookingDetailSerializer(booking, context=self.get_serializer_context()).data)
+
+    @extend_schema(
+        summary="Takroriy / ko‘p sanali bron",
+        description="Bir xil vaqtni bir nechta sanaga bitta tranzaksiyada bron qiladi. Kesishishlar barcha "
+                    "sanalar uchun bitta so‘rovda tekshiriladi; javobda har bir sana holati qaytadi.",
+        request=RecurringBookingSerializer,
+        responses={
+            201: inline_serializer('RecurringBookingResponse', {
+                'booked': serializers.IntegerField(),
+                'occurrences': RecurringBookingResultSerializer(many=True),
+            }),
+            409: inline_serializer('RecurringBookingConflictResponse', {
+                'booked': serializers.IntegerField(),
+                'occurrences': RecurringBookingResultSerializer(many=True),
+            }),
+        },
+    )
+    def recurring(self, request, stadium_id=None):
+        get_object_or_404(Stadium.objects.only('id'), pk=stadium_id)
+        params = RecurringBookingSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        results = Booking.objects.book_many(
+            stadium_id, request.user, data['dates'], data['start_hour'], data['duration'],
+            data['phone_add'], all_or_nothing=data['all_or_nothing'],
+        )
+        occurrences = []
+        for booking_date in data['dates']:
+            result = results[booking_date]
+            booked = isinstance(result, Booking)
+            occurrences.append({
+                'date': booking_date,
+                'status': 'booked' if booked else result,
+                'id': result.pk if booked else None,
+            })
+        booked_count = sum(occurrence['status'] == 'booked' for occurrence in occurrences)
+        payload = RecurringBookingResultSerializer(occurrences, many=True).data
+        return Response(
+            {'booked': booked_count, 'occurrences': payload},
+            status=status.HTTP_201_CREATED if booked_count else status.HTTP_409_CONFLICT,
+        )
+
+
+class StadiumAvailabilityView(APIView):
+    """Stadionning sanalar oralig‘idagi bo‘sh soatlari"""
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Stadionning bo‘sh vaqtlari",
+        description="Har bir kun uchun band soatlar maskasi va ketma-ket `duration` soat bo‘sh bo‘lgan "
+                    "boshlanish soatlarini qaytaradi. Bronlar bitta so‘rovda o‘qiladi.",
+        parameters=[
+            OpenApiParameter('from', OpenApiTypes.DATE, description='Boshlanish sanasi, standart bugun'),
+            OpenApiParameter('to', OpenApiTypes.DATE, description='Tugash sanasi (shu kun ham), standart from + 6 kun'),
+            OpenApiParameter('duration', int, enum=[1, 2, 3], description='Bron davomiyligi (soat), standart 1'),
+        ],
+        responses={200: AvailabilityDaySerializer(many=True)},
+    )
+    def get(self, request, stadium_id):
+        get_object_or_404(Stadium.objects.only('id'), pk=stadium_id)
+        params = AvailabilityQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        days = stadium_availability(
+            stadium_id,
+            params.validated_data['from'],
+            params.validated_data['to'],
+            params.validated_data['duration'],
+        )
+        return Response(AvailabilityDaySerializer(days, many=True).data)
+
+
+class PlainErrorRenderer(BaseRenderer):
+    """
+    Fayl/feed qaytaradigan viewlar uchun: Accept: text/calendar, text/csv va h.k. 406 bermasin.
+    Faqat xato javoblari shu yerdan o‘tadi; fayl o‘zi StreamingHttpResponse.
+    """
+    media_type = '*/*'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return str(data.get('detail', '') if isinstance(data, dict) else data).encode(self.charset)
+
+
+class BaseCalendarFeedView(APIView):
+    """
+    Bronlar iCalendar feedi. Imzolangan `?token=` yoki JWT bilan ochiladi.
+    O‘zgarmagan feed uchun If-None-Match ga 304 qaytadi (bron qatorlari o‘qilmaydi).
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, PlainErrorRenderer]
+    kind = None
+
+    def get_feed(self, object_id):
+        """(kalendar nomi, ruxsatli foydalanuvchi id lari, bronlar queryseti) yoki None"""
+        raise NotImplementedError
+
+    def get(self, request, object_id):
+        feed = self.get_feed(object_id)
+        if feed is None:
+            raise NotFound()
+        name, allowed_user_ids, bookings = feed
+
+        user = request.user
+        token = request.query_params.get('token')
+        has_access = check_feed_token(self.kind, object_id, token, allowed_user_ids) or (
+                user.is_authenticated and (user.role == 'admin' or user.id in allowed_user_ids)
+        )
+        if not has_access:
+            raise PermissionDenied("Kalendar uchun token noto‘g‘ri.")
+
+        etag = feed_etag(name, bookings)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(
+                stream_calendar(name, calendar_rows(bookings)), content_type='text/calendar; charset=utf-8'
+            )
+            response['Content-Disposition'] = f'inline; filename="{self.kind}-{object_id}.ics"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+@extend_schema(summary="Stadion bronlari kalendari (iCalendar)", parameters=[
+    OpenApiParameter('token', str, description='Imzolangan feed tokeni (calendar/feeds/ dan)'),
+], responses={(200, 'text/calendar'): OpenApiTypes.STR, 304: None})
+class StadiumCalendarView(BaseCalendarFeedView):
+    kind = 'stadium'
+
+    def get_feed(self, object_id):
+        stadium = Stadium.objects.filter(pk=object_id).values('name', 'owner_id', 'manager_id').first()
+        if stadium is None:
+            return None
+        return stadium['name'], {stadium['owner_id'], stadium['manager_id']}, Booking.objects.filter(
+            stadium_id=object_id)
+
+
+@extend_schema(summary="Menejer stadionlari bronlari kalendari (iCalendar)", parameters=[
+    OpenApiParameter('token', str, description='Imzolangan feed tokeni (calendar/feeds/ dan)'),
+], responses={(200, 'text/calendar'): OpenApiTypes.STR, 304: None})
+class ManagerCalendarView(BaseCalendarFeedView):
+    kind = 'manager'
+
+    def get_feed(self, object_id):
+        manager = User.objects.filter(pk=object_id, role='manager').values('name').first()
+        if manager is None:
+            return None
+        return manager['name'], {object_id}, Booking.objects.filter(stadium__manager_id=object_id)
+
+
+class CalendarFeedListView(APIView):
+    """Joriy foydalanuvchi kalendar ilovasiga qo‘sha oladigan feed havolalari"""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(summary="Kalendar feedlari havolalari", responses={200: inline_serializer('CalendarFeed', {
+        'name': serializers.CharField(),
+        'url': serializers.URLField(),
+    }, many=True)})
+    def get(self, request):
+        user = request.user
+        feeds = []
+        if user.role == 'manager':
+            url = reverse('manager-calendar', args=[user.id])
+            feeds.append({'name': user.name, 'url': f'{url}?token={feed_token("manager", user.id, user.id)}'})
+        stadiums = Stadium.objects.filter(Q(owner=user) | Q(manager=user)).order_by('id').values_list('id', 'name')
+        for stadium_id, name in stadiums:
+            url = reverse('stadium-calendar', args=[stadium_id])
+            feeds.append({'name': name, 'url': f'{url}?token={feed_token("stadium", stadium_id, user.id)}'})
+        for feed in feeds:
+            feed['url'] = request.build_absolute_uri(feed['url'])
+        return Response(feeds)
+
+
+class RevenueReportView(APIView):
+    """Daromad hisoboti: admin — barcha stadionlar, owner — faqat o‘zinikilar"""
+    permission_classes = [IsAuthenticated, IsAdminOrOwner]
+
+    @extend_schema(
+        summary="Daromad hisoboti",
+        description="Tushum = stadion narxi x bron davomiyligi (tasdiqlangan faol bronlar). "
+                    "`group_by`: stadium, day, week yoki month; guruhlash SQL da bajariladi.",
+        parameters=[
+            OpenApiParameter('from', OpenApiTypes.DATE, description='Boshlanish sanasi, standart to - 29 kun'),
+            OpenApiParameter('to', OpenApiTypes.DATE, description='Tugash sanasi, standart bugun'),
+            OpenApiParameter('group_by', str, enum=list(GROUP_BY), description='Standart stadium'),
+            OpenApiParameter('stadium', int, description='Faqat shu stadion'),
+        ],
+        responses={200: inline_serializer('RevenueReport', {
+            'from': serializers.DateField(),
+            'to': serializers.DateField(),
+            'group_by': serializers.CharField(),
+            'total': RevenueRowSerializer(),
+            'results': RevenueRowSerializer(many=True),
+        })},
+    )
+    def get(self, request):
+        params = RevenueQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        bookings = revenue_bookings(request.user, data['from'], data['to'], data.get('stadium'))
+        total, rows = revenue_report(bookings, data['group_by'])
+        return Response({
+            'from': data['from'],
+            'to': data['to'],
+            'group_by': data['group_by'],
+            'total': RevenueRowSerializer(total).data,
+            'results': RevenueRowSerializer(rows, many=True).data,
+        })
+
+
+class RevenueExportView(APIView):
+    """Hisobotdagi bronlarni CSV yoki NDJSON qilib oqim bilan yuklab berish"""
+    permission_classes = [IsAuthenticated, IsAdminOrOwner]
+    renderer_classes = [JSONRenderer, PlainErrorRenderer]
+
+    @extend_schema(
+        summary="Daromad eksporti (CSV/NDJSON)",
+        description="Qatorlar bazadan bo‘laklab o‘qiladi va darhol yuboriladi — butun natija xotiraga yuklanmaydi.",
+        parameters=[
+            OpenApiParameter('from', OpenApiTypes.DATE, description='Boshlanish sanasi, standart to - 29 kun'),
+            OpenApiParameter('to', OpenApiTypes.DATE, description='Tugash sanasi, standart bugun'),
+            OpenApiParameter('stadium', int, description='Faqat shu stadion'),
+            OpenApiParameter('output', str, enum=['csv', 'ndjson'], description='Standart csv'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    def get(self, request):
+        params = RevenueQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        rows = export_rows(revenue_bookings(request.user, data['from'], data['to'], data.get('stadium')))
+        if data['output'] == 'ndjson':
+            response = StreamingHttpResponse(stream_ndjson(rows), content_type='application/x-ndjson; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv; charset=utf-8')
+        filename = f"revenue-{data['from']}-{data['to']}.{data['output']}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    """
+    `from`/`to` sana oralig‘i query parametrlari (ikkalasi ham kiradi).
+
+    Berilmagan chegara `default_days` kunlik oraliq bilan to‘ldiriladi: `forward` bo‘lsa bugundan
+    oldinga, aks holda bugungacha orqaga. Oraliq `max_days` kundan oshmasligi kerak.
+    """
+    default_days = 30
+    max_days = 366
+    forward = False
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # `from` Python kalit so‘zi, shuning uchun maydonlar shu yerda qo‘shiladi
+        fields['from'] = serializers.DateField(required=False)
+        fields['to'] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        span = timedelta(days=self.default_days - 1)
+        if self.forward:
+            date_from = attrs.get('from') or timezone.localdate()
+            date_to = attrs.get('to') or date_from + span
+        else:
+            date_to = attrs.get('to') or timezone.localdate()
+            date_from = attrs.get('from') or date_to - span
+        if date_to < date_from:
+            raise serializers.ValidationError({"to": "Tugash sanasi boshlanish sanasidan oldin bo‘lmasligi kerak."})
+        if (date_to - date_from).days >= self.max_days:
+            raise serializers.ValidationError({"to": f"Oraliq {self.max_days} kundan oshmasligi kerak."})
+        attrs['from'], attrs['to'] = date_from, date_to
+        return attrs
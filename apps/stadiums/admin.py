@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
 from .models import Stadium, StadiumLocation, StadiumImage, Rating, Like, Wishlist
 
 
@@ -33,43 +35,60 @@ class StadiumAdmin(admin.ModelAdmin):
         'images_count',
         'created_date'
     )
-    list_filter = ('owner', 'manager', 'created_date')
-    search_fields = ('name', 'description')
+    # owner/manager filtrlarida faqat stadioni bor foydalanuvchilar chiqadi (barcha foydalanuvchilar emas)
+    list_filter = (
+        ('owner', admin.RelatedOnlyFieldListFilter),
+        ('manager', admin.RelatedOnlyFieldListFilter),
+        'created_date',
+    )
+    search_fields = ('name', 'description', 'owner__name', 'owner__phone', 'manager__name', 'manager__phone')
+    autocomplete_fields = ('owner', 'manager')
+    list_select_related = ('owner', 'manager')
     inlines = [StadiumLocationInline, StadiumImageInline]
     list_editable = ('price',)  # Faqat narxni tahrirlash mumkin
     readonly_fields = ('views',)
     ordering = ('-created_date',)
 
-    # O‘rtacha reyting
+    # Changelistdagi sonlar bitta SQL so‘rovda subquery annotatsiyalari bilan olinadi
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('search_vector').with_counts(
+            'bookings', 'likes', 'wishlist', 'images',
+        )
+
+    # O‘rtacha reyting (Stadium dagi rating_sum/rating_count dan)
     def average_rating(self, obj):
-        return obj.average_rating
+        return round(obj.average_rating, 2)
 
     average_rating.short_description = "O‘rtacha reyting"
+    average_rating.admin_order_field = Cast('rating_sum', FloatField()) / NullIf(F('rating_count'), 0)
 
     # Yoqtirishlar soni
     def likes_count(self, obj):
-        return Like.objects.filter(stadium=obj).count()
+        return obj.likes_count
 
     likes_count.short_description = "Yoqtirishlar soni"
+    likes_count.admin_order_field = 'likes_count'
 
     # Istaklar ro‘yxati soni
     def wishlist_count(self, obj):
-        return Wishlist.objects.filter(stadium=obj).count()
+        return obj.wishlist_count
 
     wishlist_count.short_description = "Istaklar soni"
+    wishlist_count.admin_order_field = 'wishlist_count'
 
     # Bronlar soni
     def bookings_count(self, obj):
-        from apps.bookings.models import Booking
-        return Booking.objects.filter(stadium=obj).count()
+        return obj.bookings_count
 
     bookings_count.short_description = "Bronlar soni"
+    bookings_count.admin_order_field = 'bookings_count'
 
     # Rasmlar soni
     def images_count(self, obj):
-        return obj.images.count()
+        return obj.images_count
 
     images_count.short_description = "Rasmlar soni"
+    images_count.admin_order_field = 'images_count'
 
 
 # Reyting admin
@@ -0,0 +1,145 @@
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+VIEWS_CACHE_KEY = 'stadiums:views:{}'
+PENDING_CACHE_KEY = 'stadiums:views:pending'
+# Ko‘rishi bor stadionlar jurnali: DIRTY_KEY.format(n) -> stadium_id, n = 1..SEQ_KEY
+SEQ_KEY = 'stadiums:views:seq'
+DIRTY_KEY = 'stadiums:views:dirty:{}'
+FLUSHED_SEQ_KEY = 'stadiums:views:flushed'
+FLUSH_LOCK_KEY = 'stadiums:views:flush'
+RETRY_LOCK_KEY = 'stadiums:views:retry'
+FLUSHING_KEY = 'stadiums:views:flushing'
+FLUSHING_TIMEOUT = 60
+FLUSH_CHUNK_SIZE = 500
+
+
+class ViewCounter:
+    """
+    Stadion ko‘rishlarini umumiy keshda (Redis) `cache.incr` bilan yig‘ib, vaqti-vaqti bilan bazaga yozadi.
+    Hisoblagichlar barcha worker lar uchun umumiy, shuning uchun `flush_stadium_views` buyrug‘i ham ularni yozadi.
+    - STADIUM_VIEWS_FLUSH_INTERVAL: ko‘rishlar necha soniyada bir marta bazaga yoziladi
+    - STADIUM_VIEWS_MAX_PENDING: yozilmagan ko‘rishlar shu songa yetsa, interval kutilmaydi
+
+    So‘rov yo‘lida faqat jurnaldagi (ko‘rishi bor) stadionlar yoziladi; barcha stadionlarni ko‘rib
+    chiqish (jurnaldan tushib qolganlari uchun) faqat `flush_stadium_views` buyrug‘ida.
+    """
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'STADIUM_VIEWS_FLUSH_INTERVAL', 30)
+
+    @property
+    def max_pending(self):
+        return getattr(settings, 'STADIUM_VIEWS_MAX_PENDING', 1000)
+
+    @staticmethod
+    def increment(key, delta):
+        # incr kalit bo‘lmasa ValueError beradi; add esa faqat kalit yo‘q bo‘lsa yozadi
+        if cache.add(key, delta, timeout=None):
+            return delta
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, delta, timeout=None)
+            return delta
+
+    def mark_dirty(self, stadium_id):
+        cache.set(DIRTY_KEY.format(self.increment(SEQ_KEY, 1)), stadium_id, timeout=None)
+
+    def record(self, stadium_id, hits=1):
+        # Hisoblagich 0 dan o‘zgargan bo‘lsa, stadion jurnalga yoziladi
+        if self.increment(VIEWS_CACHE_KEY.format(stadium_id), hits) == hits:
+            self.mark_dirty(stadium_id)
+        pending = self.increment(PENDING_CACHE_KEY, hits)
+        # Interval ichida faqat bitta worker yozadi (lock kalit interval tugaganda o‘chadi)
+        due = pending >= self.max_pending or cache.add(FLUSH_LOCK_KEY, True, self.flush_interval)
+        if due and cache.add(RETRY_LOCK_KEY, True, 1):
+            try:
+                self.flush_dirty()
+            except Exception:
+                # So‘rov yo‘lida bazaga yozish xatosi javobni buzmasligi kerak: ko‘rishlar keshda qoladi,
+                # keyingi urinish interval tugagach
+                cache.set(RETRY_LOCK_KEY, True, self.flush_interval)
+                logger.exception("Stadion ko‘rishlarini bazaga yozib bo‘lmadi")
+
+    def flush_dirty(self):
+        """Jurnaldagi stadionlarni yozadi: ish hajmi katalogga emas, ko‘rilgan stadionlar soniga bog‘liq"""
+        if not cache.add(FLUSHING_KEY, True, FLUSHING_TIMEOUT):
+            return 0  # Boshqa worker yozyapti
+        try:
+            flushed = 0
+            start = (cache.get(FLUSHED_SEQ_KEY) or 0) + 1
+            end = cache.get(SEQ_KEY) or 0
+            for chunk_start in range(start, end + 1, FLUSH_CHUNK_SIZE):
+                chunk_end = min(chunk_start + FLUSH_CHUNK_SIZE - 1, end)
+                keys = [DIRTY_KEY.format(seq) for seq in range(chunk_start, chunk_end + 1)]
+                flushed += self.flush_chunk(set(cache.get_many(keys).values()))
+                # Xato bo‘lsa, jurnal joyida qoladi va keyingi flush da qayta o‘qiladi
+                cache.set(FLUSHED_SEQ_KEY, chunk_end, timeout=None)
+                cache.delete_many(keys)
+            return flushed
+        finally:
+            cache.delete(FLUSHING_KEY)
+
+    def flush(self):
+        """Barcha stadionlar hisoblagichlarini yozadi (`flush_stadium_views` buyrug‘i uchun)"""
+        from .models import Stadium
+
+        while not cache.add(FLUSHING_KEY, True, FLUSHING_TIMEOUT):
+            time.sleep(0.5)
+        try:
+            flushed = 0
+            stadium_ids = Stadium.objects.order_by('pk').values_list('pk', flat=True)
+            chunk = []
+            for stadium_id in stadium_ids.iterator(chunk_size=FLUSH_CHUNK_SIZE):
+                chunk.append(stadium_id)
+                if len(chunk) >= FLUSH_CHUNK_SIZE:
+                    flushed += self.flush_chunk(chunk)
+                    chunk = []
+            if chunk:
+                flushed += self.flush_chunk(chunk)
+            return flushed
+        finally:
+            cache.delete(FLUSHING_KEY)
+
+    def flush_chunk(self, stadium_ids):
+        from .models import Stadium
+
+        keys = {VIEWS_CACHE_KEY.format(stadium_id): stadium_id for stadium_id in stadium_ids}
+        pending = {keys[key]: hits for key, hits in cache.get_many(list(keys)).items() if hits}
+        if not pending:
+            return 0
+
+        # O‘qilgan ko‘rishlar keshdan ayiriladi: shu orada qo‘shilganlari keyingi flush ga qoladi
+        for stadium_id, hits in pending.items():
+            if cache.decr(VIEWS_CACHE_KEY.format(stadium_id), hits) > 0:
+                self.mark_dirty(stadium_id)
+        total = sum(pending.values())
+
+        # Bir xil sondagi ko‘rishlar bitta UPDATE ... SET views = views + n ga guruhlanadi
+        by_hits = defaultdict(list)
+        for stadium_id, hits in pending.items():
+            by_hits[hits].append(stadium_id)
+        try:
+            with transaction.atomic():
+                for hits, ids in by_hits.items():
+                    Stadium.objects.filter(pk__in=sorted(ids)).update(views=F('views') + hits)
+        except Exception:
+            # Yozib bo‘lmasa, ko‘rishlar keyingi flush uchun keshga qaytariladi
+            for stadium_id, hits in pending.items():
+                self.increment(VIEWS_CACHE_KEY.format(stadium_id), hits)
+            raise
+        self.increment(PENDING_CACHE_KEY, -total)
+        return total
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.stadiums.models import StadiumImage, CommentImage
+from apps.stadiums.thumbnails import build_variants_task, get_executor, variants_ready
+
+
+class Command(BaseCommand):
+    help = "Variantlari yo‘q (yoki eskirgan) stadion va izoh rasmlari uchun WebP variantlarini yaratadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Barcha rasmlar variantlarini qayta yaratish")
+
+    def handle(self, *args, **options):
+        executor = get_executor()
+        futures = []
+        for model in (StadiumImage, CommentImage):
+            for instance in model.objects.only('pk', 'image', 'variants').iterator():
+                if options['all'] or not variants_ready(instance):
+                    futures.append(executor.submit(build_variants_task, model, instance.pk))
+
+        done = sum(1 for future in futures if future.result())
+        self.stdout.write(self.style.SUCCESS(f"{done} ta rasm qayta ishlandi, {len(futures) - done} ta xato."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.stadiums.counters import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Umumiy keshda yig‘ilgan stadion ko‘rishlarini darhol bazaga yozadi. "
+        "Cron orqali yoki deploy oldidan chaqiriladi (so‘rovlar bo‘lmasa ham ko‘rishlar yozilsin)."
+    )
+
+    def handle(self, *args, **options):
+        flushed = view_counter.flush()
+        self.stdout.write(self.style.SUCCESS(f"{flushed} ta ko‘rish bazaga yozildi."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.stadiums.models import Stadium
+
+
+class Command(BaseCommand):
+    help = "Stadionlarning rating_sum/rating_count maydonlarini Rating jadvalidan qayta hisoblaydi"
+
+    def handle(self, *args, **options):
+        updated = Stadium.rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta stadion reytingi qayta hisoblandi."))
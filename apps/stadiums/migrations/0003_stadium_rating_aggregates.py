@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 05:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Stadium = apps.get_model('stadiums', 'Stadium')
+    Rating = apps.get_model('stadiums', 'Rating')
+    ratings = Rating.objects.filter(stadium=OuterRef('pk')).order_by().values('stadium')
+    Stadium.objects.update(
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rank')).values('total')), 0),
+        rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0002_comment_commentimage_like_rating_wishlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stadium',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Baholar soni'),
+        ),
+        migrations.AddField(
+            model_name='stadium',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Baholar yig‘indisi'),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
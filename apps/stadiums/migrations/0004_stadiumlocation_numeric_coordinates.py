@@ -0,0 +1,76 @@
+# Generated by Django 5.2 on 2026-10-18 05:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def parse_coordinate(value, limit):
+    if value is None:
+        return None
+    try:
+        number = float(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return None
+    return number if -limit <= number <= limit else None
+
+
+def copy_coordinates(apps, schema_editor):
+    StadiumLocation = apps.get_model('stadiums', 'StadiumLocation')
+    locations = StadiumLocation.objects.exclude(latitude__isnull=True, longitude__isnull=True)
+    for location in locations.iterator():
+        location.latitude_value = parse_coordinate(location.latitude, 90)
+        location.longitude_value = parse_coordinate(location.longitude, 180)
+        location.save(update_fields=['latitude_value', 'longitude_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0003_stadium_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stadiumlocation',
+            name='latitude_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stadiumlocation',
+            name='longitude_value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_coordinates, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='stadiumlocation',
+            name='latitude',
+        ),
+        migrations.RemoveField(
+            model_name='stadiumlocation',
+            name='longitude',
+        ),
+        migrations.RenameField(
+            model_name='stadiumlocation',
+            old_name='latitude_value',
+            new_name='latitude',
+        ),
+        migrations.RenameField(
+            model_name='stadiumlocation',
+            old_name='longitude_value',
+            new_name='longitude',
+        ),
+        migrations.AlterField(
+            model_name='stadiumlocation',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)], verbose_name='Kenglik'),
+        ),
+        migrations.AlterField(
+            model_name='stadiumlocation',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)], verbose_name='Uzunlik'),
+        ),
+        migrations.AddIndex(
+            model_name='stadiumlocation',
+            index=models.Index(fields=['latitude', 'longitude'], name='stadiumlocation_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 05:51
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indeks va mavjud yozuvlarni to‘ldirish faqat PostgreSQL uchun
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS stadium_search_vector_gin ON stadiums_stadium USING gin (search_vector)'
+    )
+    Stadium = apps.get_model('stadiums', 'Stadium')
+    StadiumLocation = apps.get_model('stadiums', 'StadiumLocation')
+    address = StadiumLocation.objects.filter(stadium=OuterRef('pk')).values('address')[:1]
+    Stadium.objects.update(search_vector=(
+            SearchVector('name', weight='A', config='simple') +
+            SearchVector(Coalesce(Subquery(address), Value('')), weight='B', config='simple') +
+            SearchVector('description', weight='C', config='simple')
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS stadium_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0004_stadiumlocation_numeric_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stadium',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0005_stadium_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commentimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='stadiumimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantlar'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 05:55
+
+from django.db import migrations, models
+
+
+def fill_comment_tree(apps, schema_editor):
+    Comment = apps.get_model('stadiums', 'Comment')
+    parents = dict(Comment.objects.values_list('id', 'parent_id'))
+    updated = []
+    for comment in Comment.objects.only('id', 'parent_id').iterator():
+        depth, root_id, seen = 0, comment.id, {comment.id}
+        parent_id = comment.parent_id
+        while parent_id is not None and parent_id not in seen:
+            seen.add(parent_id)
+            depth, root_id = depth + 1, parent_id
+            parent_id = parents.get(parent_id)
+        comment.depth = depth
+        comment.top_level_comment_id = root_id if depth else None
+        updated.append(comment)
+    Comment.objects.bulk_update(updated, ['depth', 'top_level_comment_id'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='top_level_comment_id',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_comment_tree, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 05:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stadiums', '0007_comment_depth'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stadium',
+            index=models.Index(fields=['created_date', 'id'], name='stadium_created_id_idx'),
+        ),
+    ]
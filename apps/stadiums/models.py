@@ -1,7 +1,139 @@
-from django.db import models
+from math import cos, degrees, radians
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connections, models
+from django.db.models import (
+    F, Case, Count, Exists, FloatField, IntegerField, OuterRef, Prefetch, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import ASin, Cast, Coalesce, Cos, NullIf, Power, Radians, Sin, Sqrt
 from apps.account.models import User
 from django.core.exceptions import PermissionDenied
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
+from .thumbnails import image_post_save
+
+
+EARTH_RADIUS_KM = 6371.0
+STATISTICS_CACHE_KEY = 'stadiums:statistics:totals'
+# Matnlar o‘zbek/rus aralash bo‘lgani uchun tilga bog‘liq bo‘lmagan konfiguratsiya
+SEARCH_CONFIG = 'simple'
+
+
+def count_subquery(model, field='stadium'):
+    # Stadion bo‘yicha bog‘langan yozuvlar soni (korrelyatsiyalangan subquery, JOIN ko‘paytirmasdan)
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(total=Count('pk')).values('total'), output_field=IntegerField()), 0)
+
+
+def stadium_search_vector():
+    # Nom (A), manzil (B) va tavsif (C) og‘irliklari bilan tsvector ifodasi
+    address = StadiumLocation.objects.filter(stadium=OuterRef('pk')).values('address')[:1]
+    return (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+            SearchVector(Coalesce(Subquery(address), Value('')), weight='B', config=SEARCH_CONFIG) +
+            SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+class StadiumQuerySet(models.QuerySet):
+    def for_read(self):
+        # StadiumGetSerializer uchun: owner/manager/location bitta JOIN da, rasmlar bitta qo‘shimcha so‘rovda
+        return self.select_related('owner', 'manager', 'location').prefetch_related('images').defer('search_vector')
+
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Berilgan nuqtadan radius_km ichidagi stadionlar, `distance` (km) annotatsiyasi bilan.
+        Avval (latitude, longitude) indeksi bo‘yicha bounding box bilan nomzodlar toraytiriladi,
+        keyin faqat ular uchun aniq haversine masofa hisoblanadi.
+        """
+        lat_delta = degrees(radius_km / EARTH_RADIUS_KM)
+        qs = self.filter(location__latitude__range=(latitude - lat_delta, latitude + lat_delta))
+
+        cos_lat = cos(radians(latitude))
+        if cos_lat > 1e-6:
+            lon_delta = degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+            if lon_delta < 180:
+                west, east = longitude - lon_delta, longitude + lon_delta
+                if west < -180:
+                    qs = qs.filter(Q(location__longitude__gte=west + 360) | Q(location__longitude__lte=east))
+                elif east > 180:
+                    qs = qs.filter(Q(location__longitude__gte=west) | Q(location__longitude__lte=east - 360))
+                else:
+                    qs = qs.filter(location__longitude__range=(west, east))
+
+        half_dlat = Radians(F('location__latitude') - Value(latitude)) / 2
+        half_dlon = Radians(F('location__longitude') - Value(longitude)) / 2
+        a = Power(Sin(half_dlat), 2) + (
+                Value(cos_lat) * Cos(Radians(F('location__latitude'))) * Power(Sin(half_dlon), 2)
+        )
+        distance = Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a))
+        return qs.annotate(distance=models.ExpressionWrapper(distance, output_field=FloatField())).filter(
+            distance__lte=radius_km
+        )
+
+    def search(self, query):
+        """
+        Nom, tavsif va manzil bo‘yicha qidiruv, `search_rank` bo‘yicha saralangan.
+        PostgreSQL da GIN indeksli search_vector ishlatiladi, boshqa bazalarda (SQLite) icontains.
+        """
+        if connections[self.db].vendor == 'postgresql':
+            search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+            # ts_rank real (float4) qaytaradi: keyset kursoridagi float bilan aynan teng bo‘lishi uchun double ga
+            return self.filter(search_vector=search_query).annotate(
+                search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+            ).order_by('-search_rank', '-created_date')
+
+        qs = self
+        rank = Value(0)
+        for term in query.split():
+            qs = qs.filter(
+                Q(name__icontains=term) | Q(location__address__icontains=term) | Q(description__icontains=term)
+            )
+            rank = rank + Case(
+                When(name__icontains=term, then=Value(3)),
+                When(location__address__icontains=term, then=Value(2)),
+                default=Value(1),
+            )
+        return qs.annotate(
+            search_rank=models.ExpressionWrapper(rank, output_field=IntegerField())
+        ).order_by('-search_rank', '-created_date')
+
+    def with_counts(self, *names):
+        """`<nom>_count` subquery annotatsiyalari; nomlar berilmasa hammasi qo‘shiladi"""
+        from apps.bookings.models import Booking
+
+        # Reytinglar soni Stadium.rating_count maydonida saqlanadi
+        counts = {
+            'bookings': lambda: count_subquery(Booking),
+            'likes': lambda: count_subquery(Like),
+            'wishlist': lambda: count_subquery(Wishlist),
+            'comments': lambda: count_subquery(Comment, 'product'),
+            'images': lambda: count_subquery(StadiumImage),
+        }
+        return self.annotate(**{f'{name}_count': counts[name]() for name in names or counts})
+
+    def free_at(self, booking_date, start_hour, end_hour):
+        """
+        [start_hour, end_hour) oralig‘ida faol broni yo‘q stadionlar.
+        Bitta NOT EXISTS (anti-join) so‘rovi: (booking_date, stadium, start_hour) indeksi bo‘yicha.
+        """
+        from apps.bookings.models import Booking
+
+        overlapping = Booking.objects.overlapping(OuterRef('pk'), booking_date, start_hour, end_hour - start_hour)
+        return self.filter(~Exists(overlapping))
+
+    def with_rating(self):
+        # O‘rtacha reyting saralash uchun; reytingsiz stadionlar 0 (keyset tartibida NULL bo‘lmasin)
+        return self.annotate(rating=Coalesce(
+            Cast('rating_sum', FloatField()) / NullIf(F('rating_count'), 0), Value(0.0), output_field=FloatField()
+        ))
+
+    def update_search_vector(self):
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        return self.update(search_vector=stadium_search_vector())
 
 
 class Stadium(models.Model):
@@ -12,9 +144,20 @@ class Stadium(models.Model):
     manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='managed_stadiums',
                                 verbose_name="Menejer")
     views = models.PositiveIntegerField(default=0, verbose_name="Ko‘rishlar")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Baholar yig‘indisi")
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Baholar soni")
+    search_vector = SearchVectorField(null=True, editable=False)
     created_date = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan sana")
     modified_date = models.DateTimeField(auto_now=True, verbose_name="Yangilangan sana")
 
+    objects = StadiumQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset sahifalash tartibi: (created_date, id)
+            models.Index(fields=['created_date', 'id'], name='stadium_created_id_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         user = kwargs.pop('user', None)
 
@@ -22,30 +165,67 @@ class Stadium(models.Model):
             if user.role not in ['admin', 'owner']:
                 raise PermissionDenied("Sizga ushbu amalni bajarishga ruxsat yo‘q.")
         super().save(*args, **kwargs)
+        Stadium.objects.filter(pk=self.pk).update_search_vector()
 
     def __str__(self):
         return self.name
 
     @property
     def average_rating(self):
-        ratings = Rating.objects.filter(stadium=self)
-        return sum(rating.rank for rating in ratings) / ratings.count() if ratings else 0
+        # Saqlangan yig‘indi va sondan hisoblanadi, qo‘shimcha so‘rov yuborilmaydi
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @classmethod
+    def apply_rating_change(cls, stadium_id, rank_delta, count_delta=0):
+        # Reyting agregatlarini F() orqali bitta atomar UPDATE bilan o‘zgartirish
+        cls.objects.filter(pk=stadium_id).update(
+            rating_sum=F('rating_sum') + rank_delta,
+            rating_count=F('rating_count') + count_delta,
+        )
+
+    @classmethod
+    def rebuild_rating_aggregates(cls):
+        # Agregatlarni Rating jadvalidan bitta UPDATE bilan qayta hisoblash
+        ratings = Rating.objects.filter(stadium=OuterRef('pk')).order_by().values('stadium')
+        return cls.objects.update(
+            rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rank')).values('total')), 0),
+            rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+        )
+
+
+def stadium_read_prefetch(lookup='stadium'):
+    # StadiumGetSerializer ichma-ich ishlatilganda stadionlarni for_read() bilan oldindan yuklash
+    return Prefetch(lookup, queryset=Stadium.objects.for_read())
 
 
 class StadiumLocation(models.Model):
     stadium = models.OneToOneField(Stadium, on_delete=models.CASCADE, related_name='location', verbose_name="Stadion")
     address = models.CharField(max_length=200, verbose_name="Manzil")
-    latitude = models.CharField(max_length=50, null=True, blank=True, verbose_name="Kenglik")
-    longitude = models.CharField(max_length=50, null=True, blank=True, verbose_name="Uzunlik")
+    latitude = models.FloatField(null=True, blank=True, verbose_name="Kenglik",
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, verbose_name="Uzunlik",
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    class Meta:
+        indexes = [
+            # nearby() dagi bounding box filtri uchun
+            models.Index(fields=['latitude', 'longitude'], name='stadiumlocation_lat_lon_idx'),
+        ]
 
     def __str__(self):
         return f"{self.stadium.name} manzili"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Manzil stadion qidiruv vektoriga kiradi
+        Stadium.objects.filter(pk=self.stadium_id).update_search_vector()
+
 
 # Stadion rasmlari
 class StadiumImage(models.Model):
     stadium = models.ForeignKey(Stadium, on_delete=models.CASCADE, related_name='images', verbose_name="Stadion")
     image = models.ImageField(upload_to='stadiums/', verbose_name="Rasm")
+    variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Variantlar")
 
     def __str__(self):
         return f"{self.stadium.name} rasmi"
@@ -76,35 +256,104 @@ class Wishlist(models.Model):
         return f"{self.user} wishlisted {self.stadium.name}"
 
 
+class CommentQuerySet(models.QuerySet):
+    def thread(self, stadium_id):
+        # Stadionning butun izohlar daraxti bitta tartiblangan so‘rovda, rasmlar bitta qo‘shimcha so‘rovda
+        return self.filter(product_id=stadium_id).select_related('user').prefetch_related('images').order_by(
+            'created_date', 'id'
+        )
+
+
 class Comment(models.Model):
     parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.SET_NULL)
     product = models.ForeignKey(Stadium, on_delete=models.SET_NULL, null=True, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     comment = models.TextField()
-    top_level_comment_id = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    # Javoblar uchun ildiz izoh id si (ildiz izohlarda bo‘sh), daraja: ildiz 0, javoblar 1, 2, ...
+    top_level_comment_id = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_date = models.DateField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.product.name} (pid: {self.product.id} -> cid: {self.id})'
 
+    @property
+    def root_id(self):
+        return self.top_level_comment_id or self.id
+
     @property
     def tree(self):
         return Comment.objects.filter(top_level_comment_id=self.id)
 
 
+def build_comment_tree(comments):
+    """
+    Tekis izohlar ro‘yxatidan daraxt yig‘adi (chiziqli vaqtda).
+    Har bir izohga `tree_children` ro‘yxati biriktiriladi, ildiz izohlar qaytariladi.
+    """
+    comments = list(comments)
+    by_id = {comment.id: comment for comment in comments}
+    roots = []
+    for comment in comments:
+        comment.tree_children = []
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.tree_children.append(comment)
+    return roots
+
+
 class CommentImage(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='comment/')
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
 
-def comment_post_save(sender, instance, created, **kwargs):
-    if created:
-        if instance.parent:
-            # reply
-            instance.top_level_comment_id = instance.parent.top_level_comment_id
-        else:
-            instance.top_level_comment_id = instance.id
-        instance.save()
+def comment_pre_save(sender, instance, **kwargs):
+    # Ildiz va daraja INSERT dan oldin aniqlanadi, izohni ikkinchi marta saqlash kerak emas
+    if instance.parent_id is None:
+        instance.top_level_comment_id = None
+        instance.depth = 0
+    else:
+        parent = instance.parent
+        instance.top_level_comment_id = parent.root_id
+        instance.depth = parent.depth + 1
+        if instance.product_id is None:
+            instance.product_id = parent.product_id
+
+
+def get_statistics_totals():
+    totals = cache.get(STATISTICS_CACHE_KEY)
+    if totals is None:
+        from apps.bookings.models import Booking
+
+        totals = Stadium.objects.aggregate(
+            total_stadiums=Count('id'),
+            total_ratings=Coalesce(Sum('rating_count'), 0),
+        )
+        totals.update(
+            total_bookings=Booking.objects.count(),
+            total_likes=Like.objects.count(),
+            total_wishlists=Wishlist.objects.count(),
+            total_comments=Comment.objects.count(),
+        )
+        cache.set(STATISTICS_CACHE_KEY, totals, settings.STADIUM_STATISTICS_CACHE_TIMEOUT)
+    return totals
+
+
+def invalidate_statistics_totals(sender, **kwargs):
+    # Yozuvlar soni faqat qo‘shilganda yoki o‘chirilganda o‘zgaradi
+    if kwargs.get('created', True):
+        cache.delete(STATISTICS_CACHE_KEY)
 
 
-post_save.connect(comment_post_save, sender=Comment)
+pre_save.connect(comment_pre_save, sender=Comment)
+post_save.connect(image_post_save, sender=StadiumImage)
+post_save.connect(image_post_save, sender=CommentImage)
+for sender in (Stadium, Rating, Like, Wishlist, Comment):
+    post_save.connect(invalidate_statistics_totals, sender=sender)
+    post_delete.connect(invalidate_statistics_totals, sender=sender)
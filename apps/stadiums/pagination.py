@@ -0,0 +1,7 @@
+from apps.pagination import KeysetPagination
+
+
+class StadiumStatisticsPagination(KeysetPagination):
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 200
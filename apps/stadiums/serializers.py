@@ -1,6 +1,13 @@
+from django.conf import settings
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import Stadium, StadiumLocation, StadiumImage, Rating, Like, Wishlist, CommentImage, Comment
+from .models import (
+    Stadium, StadiumLocation, StadiumImage, Rating, Like, Wishlist, CommentImage, Comment, build_comment_tree,
+)
 from apps.account.models import User
+from apps.bookings.availability import MAX_HEATMAP_DAYS
+from apps.serializers import DateRangeQuerySerializer
 from ..account.serializers import UserSerializer, UserProfileSerializer
 
 
@@ -26,10 +33,40 @@ class StadiumLocationGetSerializer(serializers.ModelSerializer):
 
 # ------------------- StadiumImage Serializer -------------------
 
+@extend_schema_field({
+    'type': 'object',
+    'additionalProperties': {'type': 'string', 'format': 'uri'},
+    'example': {'thumbnail': 'https://example.com/media/stadiums/variants/photo.jpg.thumbnail.webp'},
+})
+class ImageVariantsField(serializers.Field):
+    """
+    Rasm variantlarining URL lari: {'thumbnail': url, 'medium': url}.
+    Variant hali tayyor bo‘lmasa, asl rasm URL i qaytariladi.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        if not obj.image:
+            return {}
+        request = self.context.get('request')
+        urls = {}
+        for variant in settings.IMAGE_VARIANTS:
+            name = (obj.variants or {}).get(variant)
+            url = obj.image.storage.url(name) if name else obj.image.url
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class StadiumImageSerializer(serializers.ModelSerializer):
+    variants = ImageVariantsField()
+
     class Meta:
         model = StadiumImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'variants']
 
 
 # ------------------- Stadium Serializers -------------------
@@ -37,8 +74,9 @@ class StadiumImageSerializer(serializers.ModelSerializer):
 class StadiumPostSerializer(serializers.ModelSerializer):
     # `location` o‘rniga alohida maydonlar qo‘shiladi
     address = serializers.CharField(write_only=True, required=False)
-    latitude = serializers.CharField(write_only=True, required=False, allow_blank=True)
-    longitude = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    latitude = serializers.FloatField(write_only=True, required=False, allow_null=True, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(write_only=True, required=False, allow_null=True, min_value=-180,
+                                       max_value=180)
 
     images = serializers.ListField(
         child=serializers.ImageField(), write_only=True, required=False
@@ -151,6 +189,94 @@ class StadiumGetSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class StadiumNearbySerializer(StadiumGetSerializer):
+    distance = serializers.FloatField(read_only=True)  # km
+
+    class Meta(StadiumGetSerializer.Meta):
+        fields = StadiumGetSerializer.Meta.fields + ['distance']
+        read_only_fields = fields
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(required=False, default=5, min_value=0.1, max_value=50)  # km
+
+
+
+class FreeSearchQuerySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    start_hour = serializers.IntegerField(min_value=4, max_value=24)
+    end_hour = serializers.IntegerField(min_value=5, max_value=25)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=0)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=0)
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lon = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius = serializers.FloatField(required=False, default=5, min_value=0.1, max_value=50)  # km
+    ordering = serializers.ChoiceField(
+        choices=['price', '-price', 'rating', '-rating', 'distance'], required=False, default='price'
+    )
+
+    def validate(self, attrs):
+        if attrs['date'] < timezone.localdate():
+            raise serializers.ValidationError({"date": "O‘tgan sana bo‘yicha qidirib bo‘lmaydi."})
+        if attrs['end_hour'] <= attrs['start_hour']:
+            raise serializers.ValidationError({"end_hour": "Tugash soati boshlanish soatidan keyin bo‘lishi kerak."})
+        if ('lat' in attrs) != ('lon' in attrs):
+            raise serializers.ValidationError({"lat": "lat va lon birga berilishi kerak."})
+        if attrs['ordering'] == 'distance' and 'lat' not in attrs:
+            raise serializers.ValidationError({"ordering": "Masofa bo‘yicha saralash uchun lat va lon kerak."})
+        if 'min_price' in attrs and 'max_price' in attrs and attrs['min_price'] > attrs['max_price']:
+            raise serializers.ValidationError({"max_price": "max_price min_price dan kichik bo‘lmasligi kerak."})
+        return attrs
+
+
+class HeatmapQuerySerializer(DateRangeQuerySerializer):
+    default_days = 365
+    max_days = MAX_HEATMAP_DAYS
+
+
+class HeatmapWeekdaySerializer(serializers.Serializer):
+    weekday = serializers.IntegerField(help_text="0 — dushanba, 6 — yakshanba")
+    days = serializers.IntegerField(help_text="Oraliqdagi shu hafta kunlari soni")
+    booked = serializers.ListField(child=serializers.IntegerField(), help_text="Har bir soat necha kun band bo‘lgan")
+
+
+class HeatmapSerializer(serializers.Serializer):
+    hours = serializers.ListField(child=serializers.IntegerField())
+    weekdays = HeatmapWeekdaySerializer(many=True)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['from'] = serializers.DateField()
+        fields['to'] = serializers.DateField()
+        return fields
+
+class StadiumStatisticsUserSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='name')
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'role']
+
+
+class StadiumStatisticsSerializer(serializers.ModelSerializer):
+    owner = StadiumStatisticsUserSerializer(read_only=True)
+    manager = StadiumStatisticsUserSerializer(read_only=True)
+    bookings_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.IntegerField(read_only=True)
+    wishlist_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Stadium
+        fields = [
+            'id', 'name', 'owner', 'manager',
+            'bookings_count', 'likes_count', 'wishlist_count', 'rating_count', 'comments_count',
+        ]
+        read_only_fields = fields
+
+
 class WishListSerializer(serializers.ModelSerializer):
     stadium = StadiumGetSerializer(read_only=True)
 
@@ -222,7 +348,10 @@ class RankSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"stadium": "Bunday stadion topilmadi."})
 
         # Foydalanuvchi allaqachon ushbu stadionga baho qo‘ygan bo‘lsa, xato qaytaramiz
-        if Rating.objects.filter(user=user, stadium=stadium).exists():
+        existing = Rating.objects.filter(user=user, stadium=stadium)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
             raise serializers.ValidationError({"stadium": "Siz allaqachon ushbu stadionga baho qo‘ygansiz."})
 
         # Rank 1 dan 10 gacha bo‘lishini qo‘shimcha tekshirish
@@ -241,9 +370,11 @@ class RankSerializer(serializers.ModelSerializer):
 
 
 class CommentImageSerializer(serializers.ModelSerializer):
+    variants = ImageVariantsField()
+
     class Meta:
         model = CommentImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'variants']
 
     def create(self, validated_data):
         validated_data['comment_id'] = self.context['cid']
@@ -252,21 +383,32 @@ class CommentImageSerializer(serializers.ModelSerializer):
 
 class MiniCommentSerializer(serializers.ModelSerializer):
     images = CommentImageSerializer(many=True)
+    children = serializers.SerializerMethodField()
+
+    def get_children(self, obj):
+        # build_comment_tree() biriktirgan javoblar, qo‘shimcha so‘rovsiz
+        return MiniCommentSerializer(getattr(obj, 'tree_children', []), many=True, context=self.context).data
 
     class Meta:
         model = Comment
-        fields = ['id', 'parent', 'user', 'comment', 'images', 'created_date']
+        fields = ['id', 'parent', 'user', 'comment', 'images', 'depth', 'children', 'created_date']
 
 
 class CommentSerializer(serializers.ModelSerializer):
     images = CommentImageSerializer(many=True)
     user = UserProfileSerializer(read_only=True)
+    top_level_comment_id = serializers.IntegerField(source='root_id', read_only=True)
     tree = serializers.SerializerMethodField(read_only=True)
 
     def get_tree(self, obj):
-        if obj.parent is None:
-            return MiniCommentSerializer(obj.tree.exclude(id=obj.id), many=True).data
-        return []
+        if obj.parent_id is not None:
+            return []
+        if not hasattr(obj, 'tree_children'):
+            # Yakka izoh uchun uning butun daraxti bitta so‘rovda yuklanadi
+            replies = Comment.objects.filter(top_level_comment_id=obj.id).exclude(id=obj.id).prefetch_related(
+                'images').order_by('created_date', 'id')
+            build_comment_tree([obj, *replies])
+        return MiniCommentSerializer(obj.tree_children, many=True, context=self.context).data
 
     class Meta:
         model = Comment
@@ -276,7 +418,7 @@ class CommentSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         images = validated_data.pop('images', [])
         validated_data['user_id'] = self.context['request'].user.id
-        validated_data['stadium_id'] = self.context['sid']
+        validated_data['product_id'] = self.context['sid']
         obj = super().create(validated_data)
         for image in images:
             CommentImage.objects.create(comment=obj, image=image['image'])
@@ -0,0 +1,93 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                thread_name_prefix='image-variants',
+            )
+    return _executor
+
+
+def variant_name(name, variant):
+    # stadiums/photo.png -> stadiums/variants/photo.png.thumbnail.webp
+    # Kengaytma nomda qoladi: photo.png va photo.jpg variantlari bir-birini ustidan yozmasligi uchun
+    directory, filename = os.path.split(name)
+    return f"{directory}/variants/{filename}.{variant}.webp"
+
+
+def variants_ready(instance):
+    if not instance.image:
+        return True
+    variants = instance.variants or {}
+    return all(
+        variants.get(variant) == variant_name(instance.image.name, variant)
+        for variant in settings.IMAGE_VARIANTS
+    )
+
+
+def build_variants(model, pk):
+    """Rasmning barcha variantlarini (WebP) yaratib, nomlarini `variants` maydoniga yozadi."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return {}
+
+    storage = instance.image.storage
+    variants = {}
+    with instance.image.open('rb') as file, Image.open(file) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'A' in source.getbands() else 'RGB')
+        for variant, options in settings.IMAGE_VARIANTS.items():
+            image = source.copy()
+            image.thumbnail(options['size'], Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, format='WEBP', quality=options.get('quality', 80), method=4)
+
+            name = variant_name(instance.image.name, variant)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[variant] = storage.save(name, ContentFile(buffer.getvalue()))
+
+    # save() emas, update(): signal qayta ishga tushmasligi uchun
+    model.objects.filter(pk=pk).update(variants=variants)
+    return variants
+
+
+def build_variants_task(model, pk):
+    # Worker oqimida bajariladi: xato loglanadi, oqimning DB ulanishi yopiladi
+    try:
+        build_variants(model, pk)
+        return True
+    except Exception:
+        logger.exception("%s(pk=%s) uchun rasm variantlarini yaratib bo‘lmadi", model.__name__, pk)
+        return False
+    finally:
+        connection.close()
+
+
+def schedule_variants(model, pk):
+    # Tranzaksiya commit bo‘lgach, so‘rov oqimidan tashqarida worker pool'da bajariladi
+    transaction.on_commit(lambda: get_executor().submit(build_variants_task, model, pk))
+
+
+def image_post_save(sender, instance, **kwargs):
+    if not variants_ready(instance):
+        schedule_variants(sender, instance.pk)
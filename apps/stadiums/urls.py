@@ -15,4 +15,8 @@ urlpatterns = [
     path('stadiums/<int:sid>/ranks/', RatingViewSet.as_view({'get': 'list', 'post': 'create'}), name='rating-list'),
     path('stadiums/<int:sid>/ranks/<int:pk>/',
          RatingViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='rating-detail'),
+    path('stadiums/<int:sid>/comments/', CommentViewSet.as_view({'get': 'list', 'post': 'create'}),
+         name='comment-list'),
+    path('stadiums/<int:sid>/comments/<int:pk>/',
+         CommentViewSet.as_view({'get': 'retrieve', 'delete': 'destroy'}), name='comment-detail'),
 ]
@@ -1,15 +1,31 @@
-from rest_framework import viewsets
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import serializers, viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, inline_serializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from apps.account.permissions import IsAdminOrOwner, IsAuthor, IsAdminOrReadOnly, IsAdminOrOwnerStadium, IsAdminUser
+from apps.bookings.availability import occupancy_heatmap
+from .counters import view_counter
 from .mixins import CreateViewSetMixin
-from .models import Stadium, Rating, Like, Wishlist, CommentImage, Comment
+from .models import (
+    Stadium, Rating, Like, Wishlist, CommentImage, Comment, stadium_read_prefetch, get_statistics_totals,
+    build_comment_tree,
+)
+from apps.pagination import KeysetPagination
+from .pagination import StadiumStatisticsPagination
 from .serializers import (
     StadiumGetSerializer,
     StadiumPostSerializer,
+    StadiumNearbySerializer,
+    NearbyQuerySerializer,
+    FreeSearchQuerySerializer,
+    HeatmapQuerySerializer,
+    HeatmapSerializer,
+    StadiumStatisticsSerializer,
     WishListSerializer,
     WishListPostSerializer,
     LikeSerializer,
@@ -27,27 +43,51 @@ class StadiumViewSet(viewsets.ModelViewSet):
     queryset = Stadium.objects.all().order_by('-created_date')
     permission_classes = [IsAdminOrOwnerStadium]
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = KeysetPagination  # (created_date, id) bo‘yicha
 
     def get_queryset(self):
         user = self.request.user
-        qs = Stadium.objects.all().order_by('-created_date')
+        qs = Stadium.objects.for_read().order_by('-created_date')
 
         if not user.is_authenticated:
             return Stadium.objects.none()
 
         if user.role == 'admin':
-            return qs
+            pass
         elif user.role == 'owner':
-            return qs.filter(owner=user)
+            qs = qs.filter(owner=user)
         elif user.role == 'manager':
-            return qs.filter(manager=user)
-        return Stadium.objects.none()
+            qs = qs.filter(manager=user)
+        else:
+            return Stadium.objects.none()
+
+        # ?q= bo‘yicha to‘liq matnli qidiruv (relevantlik bo‘yicha saralanadi)
+        query = self.request.query_params.get('q', '').strip()
+        if query and self.action == 'list':
+            qs = qs.search(query)
+        return qs
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return StadiumGetSerializer
+        if self.action == 'nearby':
+            return StadiumNearbySerializer
         return StadiumPostSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', str, description='Nom, tavsif va manzil bo‘yicha qidiruv (relevantlik bo‘yicha)'),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # Ko‘rish darhol yozilmaydi, umumiy keshda yig‘ilib guruhlab yoziladi
+        view_counter.record(response.data['id'])
+        return response
+
     @extend_schema(
         request={
             'multipart/form-data': {
@@ -59,8 +99,8 @@ class StadiumViewSet(viewsets.ModelViewSet):
                     'owner': {'type': 'integer'},
                     'manager': {'type': 'integer'},
                     'address': {'type': 'string'},
-                    'latitude': {'type': 'string'},
-                    'longitude': {'type': 'string'},
+                    'latitude': {'type': 'number'},
+                    'longitude': {'type': 'number'},
                     'images': {
                         'type': 'array',
                         'items': {'type': 'string', 'format': 'binary'},  # Fayl yuklash uchun
@@ -85,8 +125,8 @@ class StadiumViewSet(viewsets.ModelViewSet):
                     'owner': {'type': 'integer'},
                     'manager': {'type': 'integer'},
                     'address': {'type': 'string'},
-                    'latitude': {'type': 'string'},
-                    'longitude': {'type': 'string'},
+                    'latitude': {'type': 'number'},
+                    'longitude': {'type': 'number'},
                     'images': {
                         'type': 'array',
                         'items': {'type': 'string', 'format': 'binary'},  # Fayl yuklash uchun
@@ -102,79 +142,141 @@ class StadiumViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Stadionlar bo‘yicha statistika",
-        description="Umumiy stadionlar soni, har bir stadionning owneri va menejeri haqida ma’lumot qaytaradi.",
+        description="Umumiy sonlar (keshlangan) va har bir stadion uchun owner, menejer hamda bronlar, "
+                    "yoqtirishlar, istaklar, baholar va izohlar sonini qaytaradi. Ro‘yxat cursor orqali sahifalanadi.",
+        parameters=[
+            OpenApiParameter('cursor', str, description='Keyingi/oldingi sahifa cursori'),
+            OpenApiParameter('page_size', int, description='Sahifa hajmi (maksimal 200)'),
+        ],
         responses={
-            200: {
-                'type': 'object',
-                'properties': {
-                    'total_stadiums': {'type': 'integer'},
-                    'stadiums': {
-                        'type': 'array',
-                        'items': {
-                            'type': 'object',
-                            'properties': {
-                                'id': {'type': 'integer'},
-                                'name': {'type': 'string'},
-                                'owner': {
-                                    'type': 'object',
-                                    'properties': {
-                                        'id': {'type': 'integer'},
-                                        'username': {'type': 'string'},
-                                        'role': {'type': 'string'},
-                                    },
-                                },
-                                'manager': {
-                                    'type': 'object',
-                                    'properties': {
-                                        'id': {'type': 'integer'},
-                                        'username': {'type': 'string'},
-                                        'role': {'type': 'string'},
-                                    },
-                                },
-                            },
-                        },
-                    },
-                },
-            }
+            200: inline_serializer('StadiumStatisticsResponse', fields={
+                'total_stadiums': serializers.IntegerField(),
+                'totals': serializers.DictField(child=serializers.IntegerField()),
+                'next': serializers.CharField(allow_null=True),
+                'previous': serializers.CharField(allow_null=True),
+                'stadiums': StadiumStatisticsSerializer(many=True),
+            }),
         }
     )
-    @action(detail=False, methods=['get'], url_path='statistics', permission_classes=[IsAuthenticated,IsAdminUser])
+    @action(detail=False, methods=['get'], url_path='statistics', permission_classes=[IsAuthenticated, IsAdminUser],
+            pagination_class=StadiumStatisticsPagination)
     def statistics(self, request):
-        # Umumiy stadionlar sonini hisoblash
-        total_stadiums = Stadium.objects.count()
-
-        # Har bir stadionning owneri va menejeri haqida ma’lumot
-        stadiums = Stadium.objects.all()
-        stadium_data = []
-        for stadium in stadiums:
-            owner_data = {
-                'id': stadium.owner.id,
-                'username': stadium.owner.name,
-                'role': stadium.owner.role,
-            } if stadium.owner else None
-
-            manager_data = {
-                'id': stadium.manager.id,
-                'username': stadium.manager.name,
-                'role': stadium.manager.role,
-            } if stadium.manager else None
-
-            stadium_data.append({
-                'id': stadium.id,
-                'name': stadium.name,
-                'owner': owner_data,
-                'manager': manager_data,
-            })
+        # Umumiy sonlar keshdan olinadi, yozuvlar qo‘shilganda/o‘chirilganda invalidatsiya qilinadi
+        totals = get_statistics_totals()
+
+        # Owner, menejer va barcha sonlar bitta SQL so‘rovda
+        queryset = Stadium.objects.select_related('owner', 'manager').only(
+            'id', 'name', 'rating_count',
+            'owner__id', 'owner__name', 'owner__role',
+            'manager__id', 'manager__name', 'manager__role',
+        ).with_counts()
+        page = self.paginate_queryset(queryset)
+        serializer = StadiumStatisticsSerializer(page, many=True)
 
         return Response({
-            'total_stadiums': total_stadiums,
-            'stadiums': stadium_data,
+            'total_stadiums': totals['total_stadiums'],
+            'totals': totals,
+            'next': self.paginator.get_next_link(),
+            'previous': self.paginator.get_previous_link(),
+            'stadiums': serializer.data,
         })
 
+    @extend_schema(
+        summary="Yaqin atrofdagi stadionlar",
+        description="Berilgan nuqtadan `radius` km ichidagi stadionlarni masofa bo‘yicha saralab qaytaradi.",
+        parameters=[
+            OpenApiParameter('lat', float, required=True, description='Kenglik'),
+            OpenApiParameter('lon', float, required=True, description='Uzunlik'),
+            OpenApiParameter('radius', float, description='Radius (km), standart 5, maksimal 50'),
+        ],
+        responses={200: StadiumNearbySerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], url_path='nearby')
+    def nearby(self, request):
+        params = NearbyQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = Stadium.objects.for_read().nearby(
+            params.validated_data['lat'],
+            params.validated_data['lon'],
+            params.validated_data['radius'],
+        ).order_by('distance', 'id')
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Berilgan vaqtda bo‘sh stadionlar",
+        description="`date` kuni [`start_hour`, `end_hour`) oralig‘ida faol broni bo‘lmagan stadionlar. "
+                    "Narx va joylashuv bo‘yicha filtrlanadi; `lat`/`lon` berilsa javobda `distance` ham bo‘ladi.",
+        parameters=[
+            OpenApiParameter('date', OpenApiTypes.DATE, required=True, description='Sana'),
+            OpenApiParameter('start_hour', int, required=True, description='Boshlanish soati (4-24)'),
+            OpenApiParameter('end_hour', int, required=True, description='Tugash soati (5-25)'),
+            OpenApiParameter('min_price', float, description='Minimal narx'),
+            OpenApiParameter('max_price', float, description='Maksimal narx'),
+            OpenApiParameter('lat', float, description='Kenglik'),
+            OpenApiParameter('lon', float, description='Uzunlik'),
+            OpenApiParameter('radius', float, description='Radius (km), standart 5, maksimal 50'),
+            OpenApiParameter('ordering', str, enum=['price', '-price', 'rating', '-rating', 'distance'],
+                             description='Saralash, standart price'),
+        ],
+        responses={200: StadiumGetSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], url_path='free')
+    def free(self, request):
+        params = FreeSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        queryset = Stadium.objects.for_read().free_at(data['date'], data['start_hour'], data['end_hour'])
+        if 'min_price' in data:
+            queryset = queryset.filter(price__gte=data['min_price'])
+        if 'max_price' in data:
+            queryset = queryset.filter(price__lte=data['max_price'])
+        serializer_class = StadiumGetSerializer
+        if 'lat' in data:
+            queryset = queryset.nearby(data['lat'], data['lon'], data['radius'])
+            serializer_class = StadiumNearbySerializer
+        if data['ordering'].lstrip('-') == 'rating':
+            queryset = queryset.with_rating()
+        # Keyset sahifalash shu tartibga `id` qo‘shadi
+        queryset = queryset.order_by(data['ordering'])
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+        serializer = serializer_class(queryset, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Stadion bandligi issiqlik xaritasi",
+        description="Hafta kuni va soat bo‘yicha necha kun band bo‘lgani. Faqat kunlik bandlik "
+                    "yig‘indilaridan o‘qiladi; standart oraliq — oxirgi 365 kun.",
+        parameters=[
+            OpenApiParameter('from', OpenApiTypes.DATE, description='Boshlanish sanasi'),
+            OpenApiParameter('to', OpenApiTypes.DATE, description='Tugash sanasi, standart bugun'),
+        ],
+        responses={200: HeatmapSerializer},
+    )
+    @action(detail=True, methods=['get'], url_path='heatmap', permission_classes=[IsAuthenticated, IsAdminOrOwner])
+    def heatmap(self, request, pk=None):
+        stadium = get_object_or_404(Stadium.objects.only('id', 'owner_id'), pk=pk)
+        if request.user.role != 'admin' and stadium.owner_id != request.user.id:
+            raise PermissionDenied("Faqat stadion egasi yoki admin ko‘ra oladi.")
+        params = HeatmapQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        heatmap = occupancy_heatmap(stadium.id, params.validated_data['from'], params.validated_data['to'])
+        return Response(HeatmapSerializer(heatmap).data)
+
 
 class WishlistViewSet(CreateViewSetMixin, viewsets.ModelViewSet):
     model = Wishlist
-    queryset = Wishlist.objects.all()
+    queryset = Wishlist.objects.prefetch_related(stadium_read_prefetch())
     serializer_class = WishListSerializer
     serializer_post_class = WishListPostSerializer
     permission_classes = [IsAuthor | IsAdminOrReadOnly]
@@ -190,7 +292,7 @@ class WishlistViewSet(CreateViewSetMixin, viewsets.ModelViewSet):
 
 class LikeViewSet(CreateViewSetMixin, viewsets.ModelViewSet):
     model = Like
-    queryset = Like.objects.all()
+    queryset = Like.objects.prefetch_related(stadium_read_prefetch())
     serializer_class = LikeSerializer
     serializer_post_class = LikePostSerializer
     permission_classes = [IsAuthor | IsAdminOrReadOnly]
@@ -205,7 +307,7 @@ class LikeViewSet(CreateViewSetMixin, viewsets.ModelViewSet):
 
 
 class RatingViewSet(viewsets.ModelViewSet):
-    queryset = Rating.objects.all()
+    queryset = Rating.objects.prefetch_related(stadium_read_prefetch())
     serializer_class = RankSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [SearchFilter, DjangoFilterBackend]
@@ -214,16 +316,40 @@ class RatingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Admin yoki superuser bo‘lsa, barcha baholarni qaytarish
+        qs = super().get_queryset()
         if self.request.user.is_superuser or self.request.user.role == 'admin':
-            return Rating.objects.all()
+            return qs
         # Oddiy foydalanuvchilar faqat o‘z baholarini ko‘radi
-        return Rating.objects.filter(user=self.request.user)
+        return qs.filter(user=self.request.user)
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx['sid'] = self.kwargs.get('sid')  # URL dan sid ni olish
         return ctx
 
+    # Stadion reyting agregatlari baho bilan bitta tranzaksiyada yangilanadi
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            rating = serializer.save()
+            Stadium.apply_rating_change(rating.stadium_id, rating.rank, 1)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old_stadium_id, old_rank = Rating.objects.select_for_update().values_list(
+                'stadium_id', 'rank').get(pk=serializer.instance.pk)
+            rating = serializer.save()
+            if rating.stadium_id == old_stadium_id:
+                Stadium.apply_rating_change(rating.stadium_id, rating.rank - old_rank)
+            else:
+                Stadium.apply_rating_change(old_stadium_id, -old_rank, -1)
+                Stadium.apply_rating_change(rating.stadium_id, rating.rank, 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            old_rank = Rating.objects.select_for_update().values_list('rank', flat=True).get(pk=instance.pk)
+            instance.delete()
+            Stadium.apply_rating_change(instance.stadium_id, -old_rank, -1)
+
     @extend_schema(
         summary="Stadionga baho qo‘yish",
         description="Foydalanuvchi ma’lum bir stadionga baho qo‘yadi. Bir foydalanuvchi bir stadionga faqat bir marta baho qo‘yishi mumkin.",
@@ -265,6 +391,16 @@ class CommentViewSet(viewsets.ModelViewSet):
         ctx['sid'] = self.kwargs.get('sid')
         return ctx
 
+    def list(self, request, *args, **kwargs):
+        # Stadionning barcha izohlari bitta so‘rovda olinib, daraxt Python da yig‘iladi
+        roots = build_comment_tree(Comment.objects.thread(self.kwargs.get('sid')))
+        page = self.paginate_queryset(roots)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(roots, many=True)
+        return Response(serializer.data)
+
     def update(self, request, *args, **kwargs):
         pass
 
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'drf_spectacular',
     'rest_framework',
@@ -101,6 +102,24 @@ DATABASES = {
 }
 
 
+# Cache
+# Statistika va boshqa keshlar barcha workerlarda bir xil invalidatsiya qilinishi uchun
+# productionda REDIS_URL orqali umumiy kesh ishlatiladi (redis paketi kerak)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -171,7 +190,10 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Stateless rejim: foydalanuvchi har so‘rovda bazadan o‘qilmaydi, JWT claimlaridan tuziladi
+        'apps.account.authentication.ClaimsJWTAuthentication'
+        if os.getenv('JWT_STATELESS_AUTH', 'true').lower() in ('1', 'true', 'yes')
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -186,6 +208,10 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Learning streetsport system',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    'ENUM_NAME_OVERRIDES': {
+        'UserRoleEnum': 'apps.account.models.User.ROLE_CHOICES',
+        'ImportRoleEnum': ['owner', 'manager'],  # Import qilinadigan rollar
+    },
 }
 
 
@@ -246,6 +272,51 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# Stadion ko‘rishlari hisoblagichi (apps.stadiums.counters)
+STADIUM_VIEWS_FLUSH_INTERVAL = int(os.getenv('STADIUM_VIEWS_FLUSH_INTERVAL', 30))  # soniya
+STADIUM_VIEWS_MAX_PENDING = int(os.getenv('STADIUM_VIEWS_MAX_PENDING', 1000))  # shundan keyin interval kutilmaydi
+
+# Stadionlar statistikasi umumiy sonlari keshi (soniya); yozuvlar o‘zgarganda invalidatsiya qilinadi
+STADIUM_STATISTICS_CACHE_TIMEOUT = 300
+
+# Rasm variantlari (apps.stadiums.thumbnails): ro‘yxat kartalari uchun kichik, detal uchun o‘rta WebP
+IMAGE_VARIANTS = {
+    'thumbnail': {'size': (320, 320), 'quality': 75},
+    'medium': {'size': (1024, 1024), 'quality': 80},
+}
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', 2))
+
+# To‘lov vaqtida vaqtni vaqtincha band qilish (hold) muddati va sweeper partiyasi hajmi
+BOOKING_HOLD_TTL = int(os.getenv('BOOKING_HOLD_TTL', 600))  # soniya
+BOOKING_HOLD_SWEEP_BATCH = int(os.getenv('BOOKING_HOLD_SWEEP_BATCH', 1000))
+
+# iCalendar feedlari: necha kun oldingi bronlar ko‘rsatiladi va UID domeni
+BOOKING_CALENDAR_PAST_DAYS = int(os.getenv('BOOKING_CALENDAR_PAST_DAYS', 30))
+BOOKING_CALENDAR_UID_DOMAIN = os.getenv('BOOKING_CALENDAR_UID_DOMAIN', 'streetsport.uz')
+
+# Token versiyasi keshi (ClaimsJWTAuthentication), soniya: faqat umumiy (Redis) keshda, access token
+# umridan uzoq emas. LocMemCache da har worker o‘z nusxasini saqlagani uchun versiya har so‘rovda bazadan o‘qiladi
+TOKEN_VERSION_CACHE_TIMEOUT = int(SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()) if os.getenv('REDIS_URL') else 0
+
+# ClaimsUser to‘liq qatorlari uchun jarayon ichidagi LRU kesh
+CLAIMS_USER_CACHE_SIZE = int(os.getenv('CLAIMS_USER_CACHE_SIZE', 1024))
+CLAIMS_USER_CACHE_TTL = int(os.getenv('CLAIMS_USER_CACHE_TTL', 30))  # soniya
+
+# Foydalanuvchilar statistikasi keshi (soniya); User saqlanganda/o‘chirilganda invalidatsiya qilinadi
+USER_STATS_CACHE_TIMEOUT = int(os.getenv('USER_STATS_CACHE_TIMEOUT', 300))
+
+# Owner/manager larni fayldan import qilish (apps.account.importing)
+USER_IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', 500))
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', 0))  # Parol hashlash jarayonlari, 0 — CPU soni
+USER_IMPORT_MAX_ROWS = int(os.getenv('USER_IMPORT_MAX_ROWS', 200))  # API orqali bitta fayldagi qatorlar
+USER_IMPORT_API_WORKERS = int(os.getenv('USER_IMPORT_API_WORKERS', 2))  # API da parol hashlash jarayonlari, 1 — shu jarayonda
+
+# Foydalanuvchi guruhlari keshi (apps.account.membership), m2m o‘zgarganda tozalanadi
+USER_GROUPS_CACHE_TIMEOUT = int(os.getenv('USER_GROUPS_CACHE_TIMEOUT', 300))  # soniya
+
+# Necha kundan eski faol bo‘lmagan bronlar arxiv jadvaliga ko‘chiriladi (archive_bookings)
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.getenv('BOOKING_ARCHIVE_AFTER_DAYS', 30))
+
 # CELERY settings
 # CELERY_BROKER_URL = 'redis://127.0.0.1:6379'
 # CELERY_ACCEPT_CONTENT = ['application/json']